@@ -0,0 +1,67 @@
+import argparse
+import glob
+import os
+import time
+from bs4 import BeautifulSoup
+import gutenberg_parser
+
+# 저장해 둔 HTML 파일로 파싱 속도만 비교합니다. (네트워크 없음)
+# search_*.html은 검색 결과 페이지, ebook_*.html은 책 페이지로 취급합니다.
+
+
+def legacy_book_page(html):
+    """기존 크롤러의 get_book_metadata와 같은 방식의 파싱"""
+    soup = BeautifulSoup(html, 'html.parser')
+    metadata = {}
+    metadata_table = soup.find('table', class_='bibrec')
+    if metadata_table:
+        for row in metadata_table.find_all('tr'):
+            th_text = row.find('th').get_text() if row.find('th') else ''
+            td_text = row.find('td').get_text() if row.find('td') else ''
+            metadata[th_text] = td_text.strip()
+    return metadata
+
+
+def legacy_search_page(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    books = soup.select('li.booklink')
+    return books, soup.find('a', string='Next')
+
+
+def bench(func, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixtures', default='fixtures')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    for path in sorted(glob.glob(os.path.join(args.fixtures, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as file:
+            html = file.read()
+        name = os.path.basename(path)
+        if name.startswith('search_'):
+            candidates = {'legacy bs4': legacy_search_page}
+            for backend in gutenberg_parser.available_backends():
+                candidates[backend] = lambda html, backend=backend: gutenberg_parser.parse_search_page(html, backend)
+        elif name.startswith('ebook_'):
+            book_id = name[len('ebook_'):-len('.html')]
+            candidates = {'legacy bs4': legacy_book_page}
+            for backend in gutenberg_parser.available_backends():
+                candidates[backend] = lambda html, backend=backend: gutenberg_parser.parse_book_page(html, book_id, backend)
+        else:
+            continue
+        baseline = None
+        for label, func in candidates.items():
+            elapsed = bench(func, html, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{name:30} {label:12} {elapsed:8.3f} ms/page  x{baseline / elapsed:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+import requests
+from tqdm.asyncio import tqdm
+import catalog
+import failure_ledger
+import gutenberg_parser
+import gutenberg_text
+import http_client
+import index_pipeline
+import parse_pool
+import response_cache
+import retry_policy
+import url_cache
+
+# 책마다 /ebooks/{id} 페이지를 한 번만 받아 bibrec 전체와 실제 파일 링크를 함께 읽습니다.
+# 다운로더는 후보 URL을 HEAD로 확인하지 않고, 이 페이지에 나열된 파일을 바로 받습니다.
+BOOK_URL = "https://www.gutenberg.org/ebooks/{}"
+TEXT_FORMATS = ('text/plain', 'text/html')  # 본문으로 받을 형식의 우선순위 (MIME 타입)
+LEGACY_TEXT_URL = "https://www.gutenberg.org/files/{0}/{0}-0.txt"  # 링크를 모를 때 쓰던 예전 주소 규칙
+
+
+def get_book_page(book_id, attempts=None):
+    """책 페이지를 받아 BookPage를 반환합니다. 받지 못하면 None입니다.
+
+    429/503/5xx와 연결 오류는 retry_policy대로 다시 시도합니다.
+    attempts 목록을 넘기면 요청마다 URL과 상태 코드를 덧붙입니다(실패 기록용).
+    """
+    url = BOOK_URL.format(book_id)
+    for attempt in range(retry_policy.MAX_ATTEMPTS):
+        status, headers = None, None
+        try:
+            response = response_cache.fetch(url)
+            status, headers = response.status, response.headers
+        except requests.RequestException as e:
+            logging.error(f"Book ID {book_id}: Failed to retrieve metadata, {e}")
+        if attempts is not None:
+            attempts.append(failure_ledger.attempt(url, status))
+        if status == 200 and response.text:
+            return gutenberg_parser.parse_book_page(response.text, book_id)
+        if response_cache.CACHE_ONLY:
+            return None  # 캐시 전용 모드에서는 다시 시도해도 결과가 같습니다.
+        delay = retry_policy.next_delay(retry_policy.classify(status), attempt, headers)
+        if delay is None:
+            return None
+        time.sleep(delay)
+    return None
+
+
+async def get_book_page_async(session, book_id, fetch):
+    """get_book_page의 asyncio 버전. fetch(session, url)는 본문 문자열이나 None을 반환하는 코루틴입니다."""
+    html = await fetch(session, BOOK_URL.format(book_id))
+    if not html:
+        return None
+    # 파싱은 프로세스 풀에서 실행해 그동안 다른 다운로드가 멈추지 않게 합니다.
+    return await parse_pool.run(gutenberg_parser.parse_book_page, html, book_id)
+
+
+def download_link(book_id, page, formats=TEXT_FORMATS):
+    """페이지에 나열된 파일 중 formats 순서로 첫 (URL, MIME 타입)을 반환합니다.
+
+    원장에서 복구한 책은 페이지의 링크가 이미 실패했으므로 복구(책링크찾기.py)로 찾은 URL을 먼저 씁니다.
+    페이지를 받지 못했거나 맞는 형식이 없으면 url_cache에 남은 URL을 씁니다.
+    복구한 URL은 텍스트 형식만 저장하므로 MIME 타입은 None(텍스트)입니다. 둘 다 없으면 (None, None)입니다.
+    """
+    recovered = failure_ledger.recovered_url(book_id)
+    if recovered:
+        return recovered, None
+    if page is not None:
+        for mime_type in formats:
+            if mime_type in page.format_links:
+                return page.format_links[mime_type], mime_type
+    return url_cache.get_resolved(book_id), None
+
+
+def download_url(book_id, page, formats=TEXT_FORMATS):
+    return download_link(book_id, page, formats)[0]
+
+
+def get_book_text(book_id, page=None, formats=TEXT_FORMATS, guess=False):
+    """download_url로 고른 파일을 받아 본문을 반환합니다. 받지 못하면 failure_ledger에 남기고 None입니다.
+
+    guess가 True이면 고를 링크가 없을 때 LEGACY_TEXT_URL을 씁니다. PDF는 pdf_extract로 본문을 뽑습니다.
+    """
+    url, mime_type = download_link(book_id, page, formats)
+    if url is None and guess:
+        url = LEGACY_TEXT_URL.format(book_id)
+    attempts = []
+    reason = "No text format listed on the book page" if page is not None else "Failed to fetch the book page"
+    pdf_path = None
+    if url:
+        try:
+            with http_client.get(url, stream=True) as response:
+                url_cache.record_status(book_id, url, response.status_code)
+                attempts.append(failure_ledger.attempt(url, response.status_code))
+                if response.status_code != 200:
+                    reason = f"HTTP {response.status_code}"
+                elif mime_type == 'application/pdf':
+                    import pdf_extract  # PyPDF2는 PDF를 받는 크롤러에서만 필요합니다.
+                    # 임시 파일로 받기만 하고 응답을 닫아, 추출하는 동안 연결 풀의 연결을 붙잡지 않습니다.
+                    pdf_path = pdf_extract.spill(response)
+                else:
+                    # 머리말/라이선스는 받는 동안 걷어내므로 원문 전체를 메모리에 두지 않습니다.
+                    return gutenberg_text.read_response(response)
+        except requests.RequestException as e:
+            logging.error(f"Book ID {book_id}: Failed to download text, {e}")
+            attempts.append(failure_ledger.attempt(url, None))
+            reason = f"Failed to download text, {e}"
+    if pdf_path:
+        try:
+            # 페이지 추출은 프로세스 풀에서 시간/메모리 제한 안에서 합니다.
+            return pdf_extract.extract_file(pdf_path)
+        except pdf_extract.ExtractError as e:
+            logging.error(f"Book ID {book_id}: Failed to extract PDF text, {e}")
+            reason = f"Failed to extract PDF text, {e}"
+    logging.warning(f"Book ID {book_id}: All URL patterns failed.")
+    failure_ledger.record(book_id, attempts, reason)
+    return None
+
+
+def record_page_failure(book_id, attempts):
+    """책 페이지를 받지 못해 언어를 알 수 없는 책을 원장에 남깁니다. 영어가 아닌 책으로 건너뛰지 않습니다."""
+    logging.warning(f"Book ID {book_id}: Failed to fetch the book page, language unknown.")
+    failure_ledger.record(book_id, attempts, "Failed to fetch the book page")
+
+
+async def is_english_book(session, book_id, fetch):
+    """카탈로그에 있으면 카탈로그로, 없으면 책 페이지를 받아 영어 책인지 확인합니다."""
+    record = catalog.get_metadata(book_id)
+    if record:
+        return catalog.has_language(record['language'])
+    page = await get_book_page_async(session, book_id, fetch)
+    return page is not None and catalog.has_language(page.language)
+
+
+async def count_english_books_fan_out(base_url, fetch, concurrency=10):
+    """마지막 start_index를 먼저 찾은 뒤 모든 목록 페이지와 메타데이터를 동시에 가져와 셉니다."""
+    async with http_client.create_async_session() as session:
+        book_ids = await index_pipeline.fan_out_offsets(session, base_url, fetch, concurrency)
+        print(f"Collected {len(book_ids)} book IDs")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def check_language(book_id):
+            async with semaphore:
+                return await is_english_book(session, book_id, fetch)
+
+        results = await tqdm.gather(*(check_language(book_id) for book_id in book_ids), desc="Checking languages")
+    return sum(results)
@@ -0,0 +1,123 @@
+import csv
+import logging
+import os
+import re
+import tarfile
+import threading
+import xml.etree.ElementTree as ET
+
+# 구텐베르크에서 내려받은 카탈로그 파일 (https://www.gutenberg.org/cache/epub/feeds/)
+# pg_catalog.csv 또는 rdf-files.tar.bz2(혹은 압축을 푼 디렉토리)를 지원합니다.
+CATALOG_PATH = os.environ.get('GUTENBERG_CATALOG', 'pg_catalog.csv')
+
+# 카탈로그는 언어 코드를 쓰지만 크롤러는 책 페이지의 언어 이름과 비교합니다.
+LANGUAGE_NAMES = {
+    'en': 'English', 'fr': 'French', 'de': 'German', 'es': 'Spanish', 'it': 'Italian',
+    'pt': 'Portuguese', 'nl': 'Dutch', 'fi': 'Finnish', 'sv': 'Swedish', 'da': 'Danish',
+    'no': 'Norwegian', 'la': 'Latin', 'el': 'Greek', 'ru': 'Russian', 'pl': 'Polish',
+    'zh': 'Chinese', 'ja': 'Japanese', 'ko': 'Korean', 'hu': 'Hungarian', 'eo': 'Esperanto',
+}
+
+NAMESPACES = {
+    'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+    'dcterms': 'http://purl.org/dc/terms/',
+    'pgterms': 'http://www.gutenberg.org/2009/pgterms/',
+}
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def _language_name(codes):
+    return '; '.join(LANGUAGE_NAMES.get(code.strip(), code.strip()) for code in codes if code.strip())
+
+
+def _make_record(title, authors, issued, languages, subjects='', locc=''):
+    year_match = re.search(r'\d{4}', issued or '')
+    return {
+        'title': title or "No Title",
+        'author': authors or "Unknown",
+        'year': year_match.group(0) if year_match else "Unknown",
+        'language': _language_name(languages) or "Unknown",
+        'subjects': subjects,
+        'locc': locc,
+    }
+
+
+def _load_csv(path):
+    table = {}
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            if row.get('Type', 'Text') != 'Text':
+                continue
+            table[row['Text#']] = _make_record(row['Title'], row['Authors'], row['Issued'],
+                                               row['Language'].split(';'), row['Subjects'], row['LoCC'])
+    return table
+
+
+def _parse_rdf(data):
+    root = ET.fromstring(data)
+    ebook = root.find('pgterms:ebook', NAMESPACES)
+    if ebook is None:
+        return None, None
+    book_id = ebook.get(f"{{{NAMESPACES['rdf']}}}about", '').split('/')[-1]
+    title = ebook.findtext('dcterms:title', '', NAMESPACES)
+    authors = '; '.join(name.text for name in ebook.findall('dcterms:creator/pgterms:agent/pgterms:name', NAMESPACES))
+    issued = ebook.findtext('dcterms:issued', '', NAMESPACES)
+    languages = [value.text for value in ebook.findall('dcterms:language/rdf:Description/rdf:value', NAMESPACES)]
+    subjects = '; '.join(value.text for value in ebook.findall('dcterms:subject/rdf:Description/rdf:value', NAMESPACES))
+    return book_id, _make_record(title, authors, issued, languages, subjects)
+
+
+def _load_rdf(path):
+    table = {}
+    if os.path.isdir(path):
+        for directory, _, filenames in os.walk(path):
+            for filename in filenames:
+                if filename.endswith('.rdf'):
+                    with open(os.path.join(directory, filename), 'rb') as file:
+                        book_id, record = _parse_rdf(file.read())
+                    if book_id:
+                        table[book_id] = record
+    else:
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith('.rdf'):
+                    book_id, record = _parse_rdf(archive.extractfile(member).read())
+                    if book_id:
+                        table[book_id] = record
+    return table
+
+
+def load_catalog(path=CATALOG_PATH):
+    """카탈로그를 한 번만 읽어 책 ID를 키로 하는 메모리 테이블로 만듭니다."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            if path.endswith('.csv'):
+                _catalog = _load_csv(path)
+            else:
+                _catalog = _load_rdf(path)
+            logging.info(f"Loaded {len(_catalog)} books from catalog {path}")
+    return _catalog
+
+
+def is_available(path=CATALOG_PATH):
+    return os.path.exists(path)
+
+
+def get_metadata(book_id):
+    """카탈로그가 있으면 책의 메타데이터를, 없거나 책이 없으면 None을 반환합니다."""
+    if not is_available():
+        return None
+    return load_catalog().get(str(book_id))
+
+
+def has_language(languages, language='English'):
+    """'English; Latin'처럼 이어 붙인 언어 칸에 language가 들어 있는지 확인합니다."""
+    return language.lower() in str(languages or '').lower().split('; ')
+
+
+def count_books(language='English'):
+    """네트워크 없이 카탈로그에서 해당 언어의 책 수를 셉니다."""
+    return sum(1 for record in load_catalog().values() if has_language(record['language'], language))
@@ -0,0 +1,266 @@
+import argparse
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import zstandard
+from tqdm import tqdm
+import sinks
+
+# 책 본문을 zstd로 압축해 몇 개의 샤드 파일에 이어 붙이고, 위치는 SQLite 색인에 기록합니다.
+# 책마다 독립된 zstd 프레임이므로 색인의 (샤드, 오프셋, 길이)만으로 한 권을 바로 읽을 수 있습니다.
+#
+#   corpus/
+#     index.sqlite        book_id, sha256, shard, offset, length, size
+#     shard-00000.zst     프레임을 이어 붙인 파일
+#     metadata.jsonl      본문을 뺀 나머지 열 (같은 ID가 여러 번 있으면 마지막 줄이 유효합니다)
+SHARD_BYTES = 256 * 1024 ** 2  # 샤드 하나의 최대 압축 크기
+COMPRESSION_LEVEL = 10
+METADATA_FILE = 'metadata.jsonl'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS books (
+    book_id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS books_sha256 ON books (sha256);
+CREATE INDEX IF NOT EXISTS books_location ON books (shard, offset);
+'''
+
+
+def _shard_name(shard):
+    return f"shard-{shard:05d}.zst"
+
+
+class CorpusStore:
+    """한 프로세스에서만 쓰고, 읽기는 여러 프로세스에서 동시에 해도 됩니다."""
+
+    def __init__(self, path, readonly=False, level=COMPRESSION_LEVEL, columns=None):
+        """columns를 주면 Text를 뺀 열을 저장소 안의 metadata.jsonl에 함께 기록합니다."""
+        self.path = path
+        self.readonly = readonly
+        self.count = 0  # 이번에 추가한 책 수 (sinks.Sink와 같은 의미)
+        if not readonly:
+            os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        index_path = os.path.join(path, 'index.sqlite')
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(index_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+        self._maps = {}  # 샤드 번호 -> (파일, mmap)
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._file = None
+        self._metadata = None
+        if not readonly:
+            self._open_tail()
+            metadata_columns = [column for column in columns or [] if column != 'Text']
+            if metadata_columns:
+                self._metadata = sinks.JsonlSink(os.path.join(path, METADATA_FILE), metadata_columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM books').fetchone()[0]
+
+    def __contains__(self, book_id):
+        return self._locate(book_id) is not None
+
+    def _open_tail(self):
+        """마지막 샤드를 이어 쓰기용으로 엽니다. 색인에 없는 꼬리(중단된 쓰기)는 잘라냅니다."""
+        row = self._conn.execute('SELECT shard, MAX(offset + length) FROM books '
+                                 'WHERE shard = (SELECT MAX(shard) FROM books)').fetchone()
+        self._shard, end = (row[0], row[1]) if row and row[0] is not None else (0, 0)
+        self._file = open(os.path.join(self.path, _shard_name(self._shard)), 'ab')
+        if self._file.tell() > end:
+            self._file.truncate(end)
+            self._file.seek(end)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._metadata is not None:
+                self._metadata.close()
+                self._metadata = None
+            for file, mapped in self._maps.values():
+                mapped.close()
+                file.close()
+            self._maps.clear()
+            self._conn.close()
+
+    # --- 쓰기 ---
+
+    def append(self, book_id, text):
+        """본문을 추가합니다. 같은 ID에 같은 내용이 이미 있으면 아무것도 하지 않고 False를 반환합니다."""
+        body = text.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            row = self._conn.execute('SELECT sha256 FROM books WHERE book_id = ?', (str(book_id),)).fetchone()
+            if row and row[0] == digest:
+                return False
+            # 내용이 같은 다른 책이 있으면 그 프레임을 함께 가리킵니다.
+            same = self._conn.execute('SELECT shard, offset, length FROM books WHERE sha256 = ? LIMIT 1',
+                                      (digest,)).fetchone()
+            if same:
+                shard, offset, length = same
+            else:
+                frame = self._compressor.compress(body)
+                if self._file.tell() and self._file.tell() + len(frame) > SHARD_BYTES:
+                    self._file.close()
+                    self._shard += 1
+                    self._file = open(os.path.join(self.path, _shard_name(self._shard)), 'ab')
+                shard, offset, length = self._shard, self._file.tell(), len(frame)
+                self._file.write(frame)
+                self._file.flush()  # 색인보다 본문이 먼저 디스크에 있어야 합니다.
+                os.fsync(self._file.fileno())
+            # 책마다 커밋해서 크롤링 저널이 완료로 표시한 책은 색인에도 남아 있게 합니다.
+            self._conn.execute('INSERT OR REPLACE INTO books (book_id, sha256, shard, offset, length, size) '
+                               'VALUES (?, ?, ?, ?, ?, ?)', (str(book_id), digest, shard, offset, length, len(body)))
+            self.count += 1
+            return True
+
+    def write(self, record):
+        """sinks.Sink처럼 크롤러 결과 레코드를 바로 받습니다."""
+        if record.get('Text'):
+            self.append(record['ID'], record['Text'])
+            # 본문이 같아 건너뛴 책도 메타데이터는 새로 적습니다. 중단된 뒤 다시 받은 책이 빠지지 않게 합니다.
+            if self._metadata is not None:
+                self._metadata.write(record)
+
+    # --- 읽기 ---
+
+    def _locate(self, book_id):
+        with self._lock:
+            return self._conn.execute('SELECT shard, offset, length FROM books WHERE book_id = ?',
+                                      (str(book_id),)).fetchone()
+
+    def _map(self, shard):
+        with self._lock:
+            if shard not in self._maps:
+                if self._file is not None:
+                    self._file.flush()
+                file = open(os.path.join(self.path, _shard_name(shard)), 'rb')
+                self._maps[shard] = (file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            return self._maps[shard][1]
+
+    def _read(self, shard, offset, length):
+        mapped = self._map(shard)
+        if offset + length > len(mapped):
+            # 매핑한 뒤에 이어 쓴 샤드는 다시 매핑합니다.
+            with self._lock:
+                file, old = self._maps.pop(shard)
+                old.close()
+                file.close()
+            mapped = self._map(shard)
+        return self._decompressor.decompress(mapped[offset:offset + length]).decode('utf-8')
+
+    def get(self, book_id):
+        """책 ID의 본문을 반환합니다. 없으면 KeyError입니다."""
+        location = self._locate(book_id)
+        if location is None:
+            raise KeyError(book_id)
+        return self._read(*location)
+
+    def get_by_hash(self, sha256):
+        with self._lock:
+            row = self._conn.execute('SELECT shard, offset, length FROM books WHERE sha256 = ? LIMIT 1',
+                                     (sha256,)).fetchone()
+        if row is None:
+            raise KeyError(sha256)
+        return self._read(*row)
+
+    def ids(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT book_id FROM books ORDER BY shard, offset')]
+
+    def shards(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT DISTINCT shard FROM books ORDER BY shard')]
+
+    def iter_shard(self, shard):
+        """샤드 하나의 (ID, 본문)을 파일 순서대로 돌려줍니다."""
+        with self._lock:
+            rows = self._conn.execute('SELECT book_id, offset, length FROM books WHERE shard = ? ORDER BY offset',
+                                      (shard,)).fetchall()
+        for book_id, offset, length in rows:
+            yield book_id, self._read(shard, offset, length)
+
+    def iter_partition(self, rank=0, world=1):
+        """샤드를 world개로 나눠 rank번째 몫만 읽습니다. 학습 작업자마다 다른 rank를 주면 됩니다."""
+        for shard in self.shards()[rank::world]:
+            yield from self.iter_shard(shard)
+
+
+def _map_shard(path, shard, func):
+    store = CorpusStore(path, readonly=True)
+    try:
+        return [func(book_id, text) for book_id, text in store.iter_shard(shard)]
+    finally:
+        store.close()
+
+
+def map_shards(path, func, workers=None):
+    """샤드마다 프로세스 하나씩 func(book_id, text)를 실행하고 결과를 샤드 순서대로 반환합니다.
+
+    func는 모듈 최상위 함수여야 합니다.
+    """
+    with CorpusStore(path, readonly=True) as store:
+        shards = store.shards()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_map_shard, path, shard, func) for shard in shards]
+        return [result for future in futures for result in future.result()]
+
+
+def iter_records(path, columns=None):
+    """저장소의 책을 sinks.iter_records와 같은 레코드(dict)로 저장 순서대로 돌려줍니다.
+
+    columns에 Text가 없으면 본문은 읽지 않습니다.
+    """
+    metadata = {}
+    for record in sinks.iter_records(os.path.join(path, METADATA_FILE)):
+        metadata[str(record.get('ID'))] = record
+    with CorpusStore(path, readonly=True) as store:
+        for book_id in store.ids():
+            record = dict(metadata.get(book_id, {'ID': book_id}))
+            if columns is None or 'Text' in columns:
+                record['Text'] = store.get(book_id)
+            yield {name: record.get(name) for name in columns} if columns else record
+
+
+def import_records(source, path):
+    """기존 결과 파일(.tsv, .jsonl, .xlsx, .parquet)의 본문을 저장소에 넣습니다."""
+    with CorpusStore(path) as store:
+        if source.endswith('.parquet'):
+            import parquet_corpus
+            records = ({'ID': book_id, 'Text': text}
+                       for book_id, text in parquet_corpus.CorpusReader(source).iter_texts())
+        else:
+            records = sinks.iter_records(source)
+        for record in tqdm(records, desc="Packing books", unit="book"):
+            store.write(record)
+        return store.count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source', help="기존 결과 파일 (.tsv, .jsonl, .xlsx, .parquet)")
+    parser.add_argument('store', nargs='?', default='corpus', help="저장소 디렉터리")
+    args = parser.parse_args()
+    print(f"{import_records(args.source, args.store)} books added to {args.store}")
@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sys
+import time
+from urllib.parse import unquote, urlparse
+import aiohttp
+import pandas as pd
+from tqdm import tqdm
+
+# 상위 디렉토리의 공용 모듈 사용
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import file_download
+import http_client
+import retry_policy
+
+# english_books_final.csv의 링크를 동시에 내려받습니다.
+# 호스트별 동시 연결 수는 --per-host로 막고, 그 안에서는 AIMD 제한기가 429/503에 맞춰 줄입니다.
+logging.basicConfig(
+    filename='bulk_download_errors.log',
+    level=logging.ERROR,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+MAX_RETRIES = 10
+TITLE_CHARS = 80
+
+
+def get_extension(url):
+    _, ext = os.path.splitext(unquote(urlparse(url).path))
+    return ext.lower() if ext else '.dat'
+
+
+def make_filename(url, title):
+    """URL마다 고정된, 겹치지 않는 파일 이름을 만듭니다.
+
+    제목이 같은 다른 책이 있어도 겹치지 않도록 URL의 MD5(없으면 URL 해시)를 앞에 붙입니다.
+    """
+    key = file_download.md5_from_url(url) or hashlib.sha1(url.encode('utf-8')).hexdigest()
+    slug = re.sub(r'[^\w.,-]+', '_', str(title)).strip('_.')[:TITLE_CHARS] or 'untitled'
+    return f"{key[:12]}_{slug}{get_extension(url)}"
+
+
+async def download_file(session, url, title, download_dir, bytes_progress, per_host):
+    file_path = os.path.join(download_dir, make_filename(url, title))
+    # 처음부터 --per-host만큼 열어 두고, 429/503이 오면 거기서부터 줄입니다. 연결 풀보다 크게 늘 필요는 없습니다.
+    limiter = retry_policy.get_limiter(url, initial=per_host, maximum=per_host)
+    for attempt in range(MAX_RETRIES):
+        status, headers = None, None  # 연결 오류나 크기/체크섬 불일치는 일시적인 오류로 봅니다.
+        await limiter.acquire()
+        try:
+            await file_download.download_async(session, url, file_path, progress=bytes_progress.update)
+            status = 200
+            return True
+        except file_download.DownloadError as e:
+            status, headers = e.status, e.headers
+            logging.error(f"Attempt {attempt + 1} failed for {title}: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Attempt {attempt + 1} failed for {title} with error: {e!r}")
+        finally:
+            limiter.release(status)
+        # 동시 연결 슬롯을 반납한 뒤에 지터 백오프(또는 Retry-After)만큼 기다립니다.
+        delay = retry_policy.next_delay(retry_policy.classify(status), attempt, headers, MAX_RETRIES)
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+    logging.error(f"Final attempt failed. {title} not downloaded successfully.")
+    return False
+
+
+async def download_all(links, download_dir, per_host, total):
+    os.makedirs(download_dir, exist_ok=True)
+    started = time.monotonic()
+    files_progress = tqdm(total=len(links), desc='Books', unit='book', position=0)
+    bytes_progress = tqdm(desc='Received', unit='B', unit_scale=True, unit_divisor=1024, position=1)
+
+    async def run(url, title):
+        ok = await download_file(session, url, title, download_dir, bytes_progress, per_host)
+        files_progress.update(1)
+        return ok
+
+    async with http_client.create_async_session(limit=total, limit_per_host=per_host) as session:
+        results = await asyncio.gather(*(run(url, title) for url, title in links))
+    files_progress.close()
+    bytes_progress.close()
+
+    elapsed = time.monotonic() - started
+    received = bytes_progress.n
+    print(f"{sum(results)}/{len(links)} books downloaded, {received / 1024 ** 2:.1f} MiB received "
+          f"in {elapsed:.0f}s ({received / 1024 ** 2 / max(elapsed, 1e-9):.2f} MiB/s).")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--csv', default='english_books_final.csv')
+    parser.add_argument('--dir', default='./책 다운로드', help="다운로드 디렉토리")
+    parser.add_argument('--per-host', type=int, default=8, help="호스트별 동시 연결 수")
+    parser.add_argument('--total', type=int, default=32, help="전체 동시 연결 수")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    # 같은 링크가 두 번 있으면 같은 .part 파일에 동시에 쓰게 되므로 한 번만 받습니다.
+    links = {}
+    for url, title in zip(df['Download Link'].tolist(), df['Title'].tolist()):
+        links.setdefault(url, title)
+    asyncio.run(download_all(list(links.items()), args.dir, args.per_host, args.total))
+
+
+if __name__ == "__main__":
+    main()
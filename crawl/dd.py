@@ -1,10 +1,15 @@
 import pandas as pd
-import requests
 import os
+import sys
 import time
 import logging
 from tqdm import tqdm  # tqdm 라이브러리 가져오기
 
+# 상위 디렉토리의 공용 HTTP 클라이언트 사용
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import file_download
+import retry_policy
+
 # 로그 설정
 logging.basicConfig(
     filename='sequential_download_errors.log',
@@ -25,29 +30,28 @@ download_dir = './책 다운로드'
 os.makedirs(download_dir, exist_ok=True)
 
 # 순차 파일 다운로드 함수
-def download_file(url, title, download_dir, max_retries=10, delay_between_retries=10):
+def download_file(url, title, download_dir, max_retries=10):
     filename = f"{title.replace(' ', '_').replace('/', '_')}.pdf"
     file_path = os.path.join(download_dir, filename)
-    
-    retries = 0
-    while retries < max_retries:
+
+    for attempt in range(max_retries):
+        status, headers = None, None  # 연결 오류나 전송 중단은 일시적인 오류로 봅니다.
         try:
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(1024):
-                        f.write(chunk)
-                #print(f"Downloaded: {title}")
-                break
-            else:
-                raise Exception(f"Failed to download {title}: {response.status_code}")
+            # .part 파일에 받다가 끊기면 다음 시도에서 Range 요청으로 이어 받습니다.
+            file_download.download(url, file_path)
+            #print(f"Downloaded: {title}")
+            return
+        except file_download.DownloadError as e:
+            status, headers = e.status, e.headers
+            logging.error(f"Attempt {attempt + 1} failed for {title}: {e}")
         except Exception as e:
-            retries += 1
-            logging.error(f"Attempt {retries} failed for {title} with error: {e}")
-            #print(f"Retrying {title} in {delay_between_retries} seconds...")
-            time.sleep(delay_between_retries)
-    else:
-        print(f"Failed to download {title} after {max_retries} attempts.")
+            logging.error(f"Attempt {attempt + 1} failed for {title} with error: {e}")
+        # 404/410은 바로 포기하고, 429/503은 Retry-After를 따르며, 나머지는 지터 백오프로 기다립니다.
+        delay = retry_policy.next_delay(retry_policy.classify(status), attempt, headers, max_retries)
+        if delay is None:
+            break
+        time.sleep(delay)
+    print(f"Failed to download {title} after {attempt + 1} attempts.")
 
 # 모든 파일을 순차적으로 다운로드 (tqdm 추가)
 for url, title in tqdm(zip(download_links, titles), total=len(download_links), desc='Downloading books'):
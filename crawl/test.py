@@ -1,11 +1,16 @@
 import pandas as pd
-import requests
 import os
+import sys
 import time
 import logging
 from tqdm import tqdm
 from urllib.parse import urlparse
 
+# 상위 디렉토리의 공용 HTTP 클라이언트 사용
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import file_download
+import retry_policy
+
 # 로그 설정
 logging.basicConfig(
     filename='sequential_download_errors.log',
@@ -32,43 +37,30 @@ def get_extension(url):
     return ext if ext else '.dat'  # 확장자가 없으면 기본으로 '.dat' 사용
 
 # 순차 파일 다운로드 함수
-def download_file(url, title, download_dir, max_retries=10, delay_between_retries=10):
+def download_file(url, title, download_dir, max_retries=10):
     extension = get_extension(url)
     filename = f"{title.replace(' ', '_').replace('/', '_')}{extension}"
     file_path = os.path.join(download_dir, filename)
-    
-    retries = 0
-    while retries < max_retries:
+
+    for attempt in range(max_retries):
+        status, headers = None, None  # 연결 오류나 크기/체크섬 불일치는 일시적인 오류로 봅니다.
         try:
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                content_length = response.headers.get('Content-Length')
-                content_type = response.headers.get('Content-Type')
-                
-                # 로그에 Content-Length 및 Content-Type 기록
-                logging.info(f"Downloading {title} - Content-Length: {content_length}, Content-Type: {content_type}")
-                
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(1024):
-                        f.write(chunk)
-                
-                # 파일 크기 확인 (빈 파일 여부)
-                file_size = os.path.getsize(file_path)
-                if file_size < 1024:  # 예를 들어, 1KB 미만인 경우 빈 파일로 간주
-                    raise Exception(f"Downloaded file {filename} is too small, likely empty. Size: {file_size} bytes.")
-                
-                break  # 정상적으로 다운로드 완료 시 루프 종료
-            else:
-                raise Exception(f"Failed to download {title}: HTTP {response.status_code}")
+            # .part 파일에 받다가 끊기면 Range 요청으로 이어 받고,
+            # Content-Length와 URL의 MD5가 맞을 때만 최종 파일로 바꿉니다.
+            file_download.download(url, file_path)
+            return  # 정상적으로 다운로드 완료 시 종료
+        except file_download.DownloadError as e:
+            status, headers = e.status, e.headers
+            logging.error(f"Attempt {attempt + 1} failed for {title}: {e}")
         except Exception as e:
-            retries += 1
-            logging.error(f"Attempt {retries} failed for {title} with error: {e}")
-            time.sleep(delay_between_retries)
-            if retries == max_retries:
-                # 최종 시도에서도 실패한 경우 빈 파일 삭제
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                logging.error(f"Final attempt failed. {title} not downloaded successfully.")
+            logging.error(f"Attempt {attempt + 1} failed for {title} with error: {e}")
+        # 404/410은 바로 포기하고, 429/503은 Retry-After를 따르며, 나머지는 지터 백오프로 기다립니다.
+        delay = retry_policy.next_delay(retry_policy.classify(status), attempt, headers, max_retries)
+        if delay is None:
+            break
+        time.sleep(delay)
+    # 받던 .part 파일은 지우지 않고 다음 실행에서 이어 받습니다.
+    logging.error(f"Final attempt failed. {title} not downloaded successfully.")
 
 # 모든 파일을 순차적으로 다운로드 (tqdm 추가)
 for url, title in tqdm(zip(download_links, titles), total=len(download_links), desc='Downloading books'):
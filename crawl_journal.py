@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# 긴 크롤링을 중단된 지점부터 이어서 할 수 있도록 진행 상황을 SQLite(WAL)에 기록합니다.
+# - progress: 다시 시작할 목록 페이지 URL (아직 끝나지 않은 책이 남은 가장 앞 페이지)
+# - books: 책 ID별 처리 상태 ('done'은 다시 받지 않습니다)
+# 'failed'는 건너뛴 책(영어가 아닌 책 포함)과 받지 못한 책을 모두 뜻하고 완료로 세어 체크포인트를 넘깁니다.
+# 체크포인트 뒤의 페이지에서 다시 만나면 다시 시도하지만, 지나간 페이지로는 돌아가지 않습니다.
+# 받지 못한 책은 failure_ledger에 남으므로 책링크찾기.py로 URL을 찾아 다시 받습니다.
+DONE = 'done'
+FAILED = 'failed'
+JOURNAL_SUFFIX = '.journal'  # 결과 파일 옆에 둘 저널 파일 이름
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS progress (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    next_url TEXT,
+    finished INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS books (
+    book_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+'''
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def has_progress(self):
+        return bool(self._execute('SELECT 1 FROM progress') or self._execute('SELECT 1 FROM books LIMIT 1'))
+
+    def is_finished(self):
+        rows = self._execute('SELECT finished FROM progress')
+        return bool(rows and rows[0][0])
+
+    def checkpoint(self):
+        """다시 시작할 목록 페이지 URL. 기록이 없으면 None입니다."""
+        rows = self._execute('SELECT next_url FROM progress')
+        return rows[0][0] if rows else None
+
+    def set_checkpoint(self, next_url):
+        self._execute('INSERT INTO progress (id, next_url, finished, updated_at) VALUES (1, ?, 0, ?) '
+                      'ON CONFLICT(id) DO UPDATE SET next_url = excluded.next_url, updated_at = excluded.updated_at',
+                      (next_url, time.time()))
+
+    def finish(self):
+        self._execute('INSERT INTO progress (id, next_url, finished, updated_at) VALUES (1, NULL, 1, ?) '
+                      'ON CONFLICT(id) DO UPDATE SET next_url = NULL, finished = 1, updated_at = excluded.updated_at',
+                      (time.time(),))
+
+    def mark(self, book_id, status):
+        self._execute('INSERT INTO books (book_id, status, updated_at) VALUES (?, ?, ?) '
+                      'ON CONFLICT(book_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at',
+                      (str(book_id), status, time.time()))
+
+    def done_ids(self):
+        return {row[0] for row in self._execute('SELECT book_id FROM books WHERE status = ?', (DONE,))}
+
+    def reset(self):
+        self._execute('DELETE FROM progress')
+        self._execute('DELETE FROM books')
+
+
+class PageTracker:
+    """목록 페이지별로 남은 책 수를 세어, 끝나지 않은 책이 있는 가장 앞 페이지를 체크포인트로 남깁니다."""
+
+    def __init__(self, journal):
+        self.journal = journal
+        self._pending = {}
+        self._urls = {}
+        self._next_url = None
+        self._last_checkpoint = None
+        self._lock = threading.Lock()
+
+    def add_page(self, page, url, count, next_url):
+        with self._lock:
+            self._urls[page] = url
+            self._pending[page] = count
+            self._next_url = next_url
+            self._advance()
+
+    def book_finished(self, page, book_id, status):
+        self.journal.mark(book_id, status)
+        with self._lock:
+            self._pending[page] -= 1
+            self._advance()
+
+    def is_complete(self):
+        with self._lock:
+            return not self._pending
+
+    def _advance(self):
+        while self._pending and self._pending[min(self._pending)] == 0:
+            page = min(self._pending)
+            del self._pending[page]
+            del self._urls[page]
+        checkpoint = self._urls[min(self._pending)] if self._pending else self._next_url
+        if checkpoint != self._last_checkpoint:
+            self.journal.set_checkpoint(checkpoint)
+            self._last_checkpoint = checkpoint
+
+
+def for_output(output, appendable):
+    """결과 파일에 맞는 저널을 엽니다. 이미 끝난 크롤링이면 None을 반환합니다.
+
+    이어 쓸 수 없는 형식(.xlsx, .parquet)은 기록을 지우고 처음부터 다시 받습니다.
+    """
+    journal = Journal(output + JOURNAL_SUFFIX)
+    if journal.is_finished() or (os.path.exists(output) and not journal.has_progress()):
+        journal.close()
+        return None
+    if not appendable:
+        if journal.has_progress():
+            print(f"Warning: {output} cannot be appended to, so the interrupted crawl starts over. "
+                  f"Use .tsv, .jsonl or .corpus to resume.", file=sys.stderr)
+        journal.reset()
+    return journal
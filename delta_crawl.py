@@ -0,0 +1,180 @@
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from tqdm import tqdm
+import book_metadata
+import catalog
+import crawl_journal
+import failure_ledger
+import gutenberg_parser
+import index_pipeline
+import response_cache
+import sinks
+import text_decoding
+
+# 전체를 다시 받지 않고 지난 실행 이후 새로 올라온 책만 받아 기존 결과 파일을 갱신합니다.
+# 최신 공개 순서로 목록을 읽다가 이미 있는 책 ID를 만나면 멈춥니다.
+# 동기 크롤러(refinal.py, pdf_txt.py, final_crawl.py, data.py)의 공통 명령줄(main)도 여기에 있습니다.
+INDEX_URL = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en"
+NEWEST_URL = "https://www.gutenberg.org/ebooks/search/?sort_order=release_date&languages=en"
+METADATA_WORKERS = 10
+# 메타데이터가 바뀌는 것은 대개 갓 올라온 책이므로, 공개 연도가 최근인 책만 다시 확인합니다.
+RECHECK_YEARS = int(os.environ.get('GUTENBERG_RECHECK_YEARS', 1))
+RECHECK_COLUMNS = ['ID', 'Title', 'Year']
+
+
+def _is_recent(record, years=RECHECK_YEARS):
+    year = str(record.get('Year') or '')
+    return year.isdigit() and int(year) >= time.gmtime().tm_year - years
+
+
+def _recheck_metadata(record):
+    """책 페이지가 바뀌었을 때만 다시 파싱해 Title/Year를 갱신합니다. 바뀌었으면 True를 반환합니다."""
+    book_id = str(record.get('ID'))
+    try:
+        response = response_cache.fetch(f"https://www.gutenberg.org/ebooks/{book_id}")
+    except requests.RequestException as e:
+        logging.error(f"Book ID {book_id}: Failed to recheck metadata, {e}")
+        return False
+    if response.unchanged or not response.text:
+        return False  # 304: 저장해 둔 페이지와 같으므로 파싱하지 않습니다.
+    page = gutenberg_parser.parse_book_page(response.text, book_id)
+    changed = False
+    if record.get('Title') is not None and page.title != "No Title" and record['Title'] != page.title:
+        record['Title'], changed = page.title, True
+    if record.get('Year') is not None and page.release_year != "Unknown" and str(record['Year']) != page.release_year:
+        record['Year'], changed = page.release_year, True
+    return changed
+
+
+def _merged(output, updates, new_records):
+    """기존 결과 파일을 한 권씩 읽으며 바뀐 메타데이터를 반영하고, 끝에 새 책을 붙입니다."""
+    for record in sinks.iter_records(output):
+        record.update(updates.get(str(record.get('ID')), {}))
+        yield record
+    yield from new_records
+
+
+def update(output, handler, columns=None, workers=10, recheck=True):
+    """output에 없는 새 책만 handler로 처리해 추가하고, 바뀐 책 페이지의 메타데이터를 고칩니다.
+
+    기존 파일에서는 ID/Title/Year만 읽고, 공개 연도가 최근 RECHECK_YEARS년 안인 책만 다시 확인합니다.
+    새 책은 끝나는 대로 output 옆의 임시 .jsonl 파일에 쓰고, 목록을 끝까지 읽은 뒤에야 output에 옮깁니다.
+    이어 쓰는 형식(.tsv, .jsonl)에서 메타데이터가 바뀌지 않았으면 새 책만 파일 끝에 덧붙이고,
+    그 밖의 경우에는 파일을 한 권씩 읽어 다시 쓴 뒤 원래 파일과 바꿔치기합니다.
+    output이 없으면 갱신할 것이 없으므로 전체 크롤링을 합니다.
+    """
+    if not os.path.exists(output):
+        # 빈 known으로는 멈출 곳이 없어 최신 목록 전체를 저널 없이 받게 됩니다.
+        print(f"{output} does not exist; running a full crawl instead of --update.")
+        crawl(output, handler, columns, workers)
+        return
+    known = set()
+    recent = []
+    for record in sinks.iter_records(output, RECHECK_COLUMNS):
+        known.add(str(record.get('ID')))
+        if recheck and _is_recent(record):
+            recent.append(record)
+
+    updates = {}
+    if recent:
+        with ThreadPoolExecutor(max_workers=METADATA_WORKERS) as executor:
+            changes = tqdm(executor.map(_recheck_metadata, recent), total=len(recent),
+                           desc="Rechecking metadata", unit="book")
+            for record, changed in zip(recent, changes):
+                if changed:
+                    updates[str(record['ID'])] = {'Title': record['Title'], 'Year': record['Year']}
+
+    # 새 책을 메모리에 모으지 않고 임시 파일에 씁니다. 중간에 멈추면 output은 그대로이고,
+    # 다음 --update가 같은 책부터 다시 받습니다. 새 책은 공개 순서가 아니라 끝난 순서로 덧붙습니다.
+    spill_path = output + '.new.jsonl'
+    if os.path.exists(spill_path):
+        os.remove(spill_path)  # JsonlSink는 이어 쓰므로 지난 실행이 남긴 파일을 지웁니다.
+    try:
+        with sinks.open_sink(spill_path, sinks.columns_for(output, columns)) as sink, \
+                tqdm(desc="Downloading new books", unit="book") as progress:
+            index_pipeline.run_pipeline(NEWEST_URL, handler, workers=workers, progress=progress, sink=sink,
+                                        stop_at=known)
+        new_count = sum(1 for _ in sinks.iter_records(spill_path, ['ID']))
+        if new_count or updates:
+            _save(output, sinks.iter_records(spill_path), updates, columns)
+    finally:
+        if os.path.exists(spill_path):
+            os.remove(spill_path)
+    print(f"{new_count} new books, {len(updates)} metadata updates.")
+
+
+def _save(output, new_records, updates, columns):
+    if not updates and sinks.is_appendable(output):
+        with sinks.open_sink(output, columns) as sink:
+            for record in new_records:
+                sink.write(record)
+    elif updates or new_records:
+        sinks.rewrite(output, _merged(output, updates, new_records), columns)
+
+
+def _recovered_book(book_id):
+    """목록 페이지 없이 받을 책의 BookLink. 제목과 저자는 카탈로그나 책 페이지에서 채웁니다."""
+    record = catalog.get_metadata(book_id)
+    if record:
+        return gutenberg_parser.BookLink(book_id, record['title'], record['author'])
+    page = book_metadata.get_book_page(book_id)
+    if page is not None:
+        return gutenberg_parser.BookLink(book_id, page.title, '; '.join(page.authors) or "Unknown Author")
+    return gutenberg_parser.BookLink(book_id)
+
+
+def retry_recovered(output, handler, columns=None, workers=10):
+    """복구(책링크찾기.py)로 URL을 찾았지만 output에 아직 없는 책을 handler로 다시 받아 추가합니다.
+
+    크롤링 저널과 --update는 이미 지나간 책을 다시 보지 않으므로, 복구한 책은 이것으로 받습니다.
+    """
+    known = {str(record.get('ID')) for record in sinks.iter_records(output, ['ID'])}
+    book_ids = [entry['book_id'] for entry in failure_ledger.entries(pending_only=False)
+                if entry['recovered_url'] and entry['book_id'] not in known]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        books = list(executor.map(_recovered_book, book_ids))
+        new_records = [record for record in tqdm(executor.map(handler, books), total=len(books),
+                                                 desc="Downloading recovered books", unit="book") if record]
+    _save(output, new_records, {}, columns)
+    print(f"{len(new_records)}/{len(book_ids)} recovered books downloaded.")
+    return new_records
+
+
+def crawl(output, handler, columns=None, workers=10):
+    """다운로드 순위 목록 전체를 받아 output에 기록합니다. 중단되면 저널의 체크포인트부터 이어서 합니다."""
+    journal = crawl_journal.for_output(output, sinks.is_appendable(output))
+    if journal is None:
+        print("Data already downloaded.")
+        return
+    # 책이 끝날 때마다 바로 기록하므로 메모리 사용량은 동시 작업 수에만 비례합니다.
+    # 중단되면 저널의 체크포인트부터 다시 시작하고, 이미 기록한 책은 건너뜁니다.
+    with journal, sinks.open_sink(output, columns) as sink, \
+            tqdm(desc="Downloading books", unit="book") as progress:
+        index_pipeline.run_pipeline(INDEX_URL, handler, workers=workers, progress=progress, sink=sink,
+                                    journal=journal)
+
+
+def main(handler, columns=None):
+    """동기 크롤러의 명령줄을 읽고 전체 크롤링, --update, --retry-recovered 중 하나를 실행합니다.
+
+    handler(BookLink)는 결과 레코드나 None을 반환하고, columns가 없으면 출력 형식별 기본 열을 씁니다.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', default='gutenberg_books.tsv',
+                        help="결과 파일 (.tsv, .jsonl, .parquet, .xlsx, .corpus). .tsv, .jsonl, .corpus만 중단된 곳부터 이어 받습니다")
+    parser.add_argument('--update', action='store_true', help="지난 실행 이후 새로 올라온 책만 받아 결과 파일을 갱신합니다.")
+    parser.add_argument('--retry-recovered', action='store_true',
+                        help="책링크찾기.py로 URL을 찾은 책 중 결과 파일에 없는 책을 받아 추가합니다.")
+    args = parser.parse_args()
+    if args.retry_recovered:
+        retry_recovered(args.output, handler, columns)
+    elif args.update:
+        # 최신 공개 순서로 읽다가 이미 있는 책을 만나면 멈추고, 바뀐 책 페이지만 다시 파싱합니다.
+        update(args.output, handler, columns)
+    else:
+        crawl(args.output, handler, columns)
+    print(text_decoding.report())
@@ -0,0 +1,83 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 받지 못한 책을 로그 문장 대신 SQLite(WAL)에 구조화해서 남깁니다.
+# 책 ID마다 마지막 실패의 이유와 시도한 URL/상태 코드/시각을 기록하고,
+# 복구(책링크찾기.py)로 URL을 찾으면 recovered_url을 채웁니다.
+LEDGER_FILE = os.environ.get('GUTENBERG_FAILURE_LEDGER', 'failed_books.sqlite')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS failures (
+    book_id TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    attempts TEXT NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 1,
+    failed_at REAL NOT NULL,
+    recovered_url TEXT,
+    recovered_at REAL
+);
+'''
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _execute(sql, params=()):
+    global _conn
+    with _lock:
+        if _conn is None:
+            _conn = sqlite3.connect(LEDGER_FILE, check_same_thread=False, isolation_level=None)
+            _conn.execute('PRAGMA journal_mode=WAL')
+            _conn.execute('PRAGMA synchronous=NORMAL')
+            _conn.executescript(_SCHEMA)
+        return _conn.execute(sql, params).fetchall()
+
+
+def attempt(url, status):
+    """attempts 목록에 넣을 항목. status가 None이면 응답을 받지 못한 것입니다."""
+    return {'url': url, 'status': status, 'at': time.time()}
+
+
+def record(book_id, attempts, reason):
+    """책 하나의 실패를 기록합니다. 같은 책이 다시 실패하면 내용을 바꾸고 횟수를 늘립니다."""
+    _execute('INSERT INTO failures (book_id, reason, attempts, failed_at) VALUES (?, ?, ?, ?) '
+             'ON CONFLICT(book_id) DO UPDATE SET reason = excluded.reason, attempts = excluded.attempts, '
+             'failures = failures + 1, failed_at = excluded.failed_at, recovered_url = NULL, recovered_at = NULL',
+             (str(book_id), reason, json.dumps(attempts), time.time()))
+
+
+def mark_recovered(book_id, url):
+    _execute('UPDATE failures SET recovered_url = ?, recovered_at = ? WHERE book_id = ?',
+             (url, time.time(), str(book_id)))
+
+
+def recovered_url(book_id):
+    """복구(책링크찾기.py)로 찾은 URL. 복구하지 않았거나 그 뒤에 다시 실패했으면 None입니다."""
+    rows = _execute('SELECT recovered_url FROM failures WHERE book_id = ?', (str(book_id),))
+    return rows[0][0] if rows else None
+
+
+def entries(pending_only=True):
+    """기록을 dict 목록으로 반환합니다. pending_only이면 아직 복구하지 못한 책만 반환합니다."""
+    sql = 'SELECT book_id, reason, attempts, failures, failed_at, recovered_url, recovered_at FROM failures'
+    if pending_only:
+        sql += ' WHERE recovered_url IS NULL'
+    rows = _execute(sql + ' ORDER BY failed_at')
+    return [{'book_id': book_id, 'reason': reason, 'attempts': json.loads(attempts), 'failures': failures,
+             'failed_at': failed_at, 'recovered_url': recovered_url, 'recovered_at': recovered_at}
+            for book_id, reason, attempts, failures, failed_at, recovered_url, recovered_at in rows]
+
+
+def pending_ids():
+    return [row[0] for row in _execute('SELECT book_id FROM failures WHERE recovered_url IS NULL ORDER BY failed_at')]
+
+
+def close():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
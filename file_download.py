@@ -0,0 +1,169 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+from urllib.parse import urlparse
+import http_client
+
+# 큰 파일(PDF, DjVu 등)을 .part 파일로 받고, 끊기면 Range 요청으로 이어서 받습니다.
+# 크기(Content-Length/Content-Range)와 체크섬(있으면)을 확인한 뒤에만 최종 이름으로 바꿉니다.
+CHUNK_SIZE = 1024 * 1024   # 한 번에 읽을 크기
+BUFFER_SIZE = 4 * 1024 * 1024  # 파일 쓰기 버퍼
+
+_MD5_SEGMENT = re.compile(r'^[0-9a-fA-F]{32}$')
+_CONTENT_RANGE_TOTAL = re.compile(r'/(\d+)\s*$')
+
+
+class DownloadError(Exception):
+    """status가 None이면 연결 끊김, 크기/체크섬 불일치 같은 일시적인 실패입니다."""
+
+    def __init__(self, message, status=None, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers
+
+
+def md5_from_url(url):
+    """LibGen 미러 URL처럼 경로에 파일 MD5가 들어 있으면 그 값을 반환합니다."""
+    for segment in urlparse(url).path.split('/'):
+        if _MD5_SEGMENT.match(segment):
+            return segment.lower()
+    return None
+
+
+def _load_meta(meta_path):
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_meta(meta_path, headers):
+    meta = {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified')}
+    with open(meta_path, 'w', encoding='utf-8') as file:
+        json.dump(meta, file)
+
+
+def _hash_file(path, digest):
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest
+
+
+def _total_size(status, headers, offset):
+    if status == 206:
+        match = _CONTENT_RANGE_TOTAL.search(headers.get('Content-Range', ''))
+        return int(match.group(1)) if match else None
+    length = headers.get('Content-Length')
+    # gzip으로 전송되면 Content-Length는 압축된 크기이므로 비교하지 않습니다.
+    if length is None or headers.get('Content-Encoding', 'identity') != 'identity':
+        return None
+    return offset + int(length)
+
+
+def _prepare(path):
+    """(.part 경로, 메타 경로, 이어 받을 위치, 요청 헤더)를 반환합니다."""
+    part_path, meta_path = path + '.part', path + '.part.json'
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {'Accept-Encoding': 'identity'}  # 바이트 범위가 압축 전 파일 기준이 되도록 합니다.
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+        # 서버의 파일이 바뀌었으면 206 대신 200으로 전체를 다시 받습니다.
+        meta = _load_meta(meta_path)
+        validator = meta.get('etag') or meta.get('last_modified')
+        if validator:
+            headers['If-Range'] = validator
+    return part_path, meta_path, offset, headers
+
+
+def _start(status, headers, offset, meta_path):
+    """응답 상태를 보고 (쓰기 시작 위치, 전체 크기)를 정합니다. 받을 본문이 없으면 위치는 None입니다."""
+    if status == 416 and offset:
+        # 이미 끝까지 받은 .part입니다. 크기만 확인합니다.
+        match = _CONTENT_RANGE_TOTAL.search(headers.get('Content-Range', ''))
+        return None, int(match.group(1)) if match else offset
+    if status not in (200, 206):
+        raise DownloadError(f"HTTP {status}", status, headers)
+    if status == 200:
+        offset = 0
+    _save_meta(meta_path, headers)
+    return offset, _total_size(status, headers, offset)
+
+
+def _finish(path, part_path, meta_path, total, md5):
+    size = os.path.getsize(part_path)
+    if total is not None and size > total:
+        os.remove(part_path)
+        raise DownloadError(f"Download larger than expected: {size} of {total} bytes")
+    if total is not None and size < total:
+        # 끊긴 전송입니다. .part는 남겨 두고 다음 시도에서 이어 받습니다.
+        raise DownloadError(f"Incomplete download: {size} of {total} bytes")
+    if md5 and _hash_file(part_path, hashlib.md5()).hexdigest() != md5:
+        os.remove(part_path)  # 내용이 틀렸으므로 이어 받지 않고 처음부터 다시 받습니다.
+        raise DownloadError(f"Checksum mismatch for {path}")
+    os.replace(part_path, path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+
+def _content_md5(status, headers):
+    if status == 200 and headers.get('Content-MD5'):
+        return base64.b64decode(headers['Content-MD5']).hex()
+    return None
+
+
+def download(url, path, md5=None, progress=None):
+    """url을 path로 받습니다. 이미 받은 파일이면 아무것도 하지 않습니다.
+
+    실패하면 DownloadError를 던지고, 받은 부분은 .part 파일로 남겨 다음 호출에서 이어 받습니다.
+    md5가 없으면 URL에서 찾아 봅니다. progress(받은 바이트 수)는 조각마다 호출됩니다.
+    """
+    if os.path.exists(path):
+        return
+    md5 = md5 or md5_from_url(url)
+    part_path, meta_path, offset, headers = _prepare(path)
+    with http_client.get(url, stream=True, headers=headers) as response:
+        offset, total = _start(response.status_code, response.headers, offset, meta_path)
+        if offset is not None:
+            with open(part_path, 'ab' if offset else 'wb', buffering=BUFFER_SIZE) as file:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    file.write(chunk)
+                    if progress is not None:
+                        progress(len(chunk))
+            md5 = md5 or _content_md5(response.status_code, response.headers)
+    _finish(path, part_path, meta_path, total, md5)
+
+
+async def download_async(session, url, path, md5=None, progress=None):
+    """download의 aiohttp 버전입니다. 파일 열기/쓰기와 크기·체크섬 확인은 스레드에서 해서 루프를 막지 않습니다.
+
+    조각은 BUFFER_SIZE만큼 모았다가 한 번에 씁니다.
+    """
+    if await asyncio.to_thread(os.path.exists, path):
+        return
+    md5 = md5 or md5_from_url(url)
+    part_path, meta_path, offset, headers = await asyncio.to_thread(_prepare, path)
+    async with session.get(url, headers=headers) as response:
+        offset, total = await asyncio.to_thread(_start, response.status, response.headers, offset, meta_path)
+        if offset is not None:
+            file = await asyncio.to_thread(open, part_path, 'ab' if offset else 'wb')
+            buffer = bytearray()
+            try:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    buffer += chunk
+                    if len(buffer) >= BUFFER_SIZE:
+                        await asyncio.to_thread(file.write, bytes(buffer))
+                        buffer.clear()
+                    if progress is not None:
+                        progress(len(chunk))
+            finally:
+                # 끊겨도 받은 만큼은 .part에 남겨야 다음에 이어 받습니다.
+                if buffer:
+                    await asyncio.to_thread(file.write, bytes(buffer))
+                await asyncio.to_thread(file.close)
+            md5 = md5 or _content_md5(response.status, response.headers)
+    await asyncio.to_thread(_finish, path, part_path, meta_path, total, md5)
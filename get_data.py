@@ -1,5 +1,6 @@
 import requests
-from bs4 import BeautifulSoup
+import http_client
+import gutenberg_parser
 import pandas as pd
 from tqdm import tqdm
 import os
@@ -8,7 +9,7 @@ def get_book_data(book_id):
     # 책의 텍스트 데이터를 다운로드
     url = f"https://www.gutenberg.org/files/{book_id}/{book_id}-0.txt"
     try:
-        response = requests.get(url)
+        response = http_client.get(url)
         response.raise_for_status()
         return response.text
     except requests.RequestException:
@@ -18,15 +19,14 @@ def get_books_list():
     # 영어 책들의 목록을 가져오는 함수
     index_url = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en"
     books = []
-    response = requests.get(index_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    book_count = len(soup.select('li.booklink'))
-    tqdm_iterator = tqdm(soup.select('li.booklink'), desc="Downloading books", unit="book")
+    response = http_client.get(index_url)
+    book_links, _ = gutenberg_parser.parse_search_page(response.text)
+    tqdm_iterator = tqdm(book_links, desc="Downloading books", unit="book")
 
     for book in tqdm_iterator:
-        title = book.select_one('span.title').text if book.select_one('span.title') else "No Title"
-        author = book.select_one('span.subtitle').text if book.select_one('span.subtitle') else "Unknown Author"
-        book_id = book.a['href'].split('/')[-1]
+        title = book.title
+        author = book.subtitle
+        book_id = book.book_id
         text = get_book_data(book_id)
         if text:
             books.append({
@@ -0,0 +1,274 @@
+import json
+import re
+from dataclasses import dataclass, field
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+# 검색 결과 페이지(li.booklink)와 책 페이지(table.bibrec)만 빠르게 읽는 전용 파서입니다.
+# selectolax > lxml > BeautifulSoup(html.parser) 순서로 설치된 백엔드를 사용합니다.
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser  # selectolax 1.0 이전 버전
+    except ImportError:
+        HTMLParser = None
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+if HTMLParser is not None:
+    BACKEND = 'selectolax'
+elif lxml is not None:
+    BACKEND = 'lxml'
+else:
+    BACKEND = 'html.parser'
+
+BASE_URL = "https://www.gutenberg.org"
+
+
+@dataclass
+class BookLink:
+    """검색 결과 한 줄"""
+    book_id: str
+    title: str = "No Title"
+    subtitle: str = "Unknown Author"
+
+
+# 사람 이름이 들어 있는 bibrec 행. 그 밖의 역할(예: "Author of introduction, etc.")도 'Author'로 시작합니다.
+CREATOR_ROLES = ('Author', 'Creator', 'Editor', 'Translator', 'Illustrator', 'Contributor', 'Commentator',
+                 'Annotator', 'Compiler', 'Adapter', 'Photographer', 'Composer', 'Arranger', 'Other')
+# "Shelley, Mary Wollstonecraft, 1797-1851", "Homer, 751? BCE-651? BCE", "Smith, John, -1850"
+_LIFE_DATES = re.compile(r',\s*(?P<birth>(?:\d+\??(?: BCE| BC| AD)?)?)\s*-\s*(?P<death>(?:\d+\??(?: BCE| BC| AD)?)?)$')
+_DOWNLOADS = re.compile(r'([\d,]+)\s+downloads?')
+
+
+@dataclass
+class BookPage:
+    """/ebooks/{id} 페이지에서 읽은 메타데이터"""
+    book_id: str
+    title: str = "No Title"
+    language: str = "Unknown"  # 여러 언어면 "English; French"처럼 이어 붙입니다(catalog와 같은 형식).
+    release_year: str = "Unknown"
+    release_date: str = "Unknown"
+    authors: list = field(default_factory=list)  # 'Author'/'Creator' 행의 원문
+    creators: list = field(default_factory=list)  # {'role', 'name', 'birth', 'death'}
+    subjects: list = field(default_factory=list)
+    loc_class: str = ""
+    downloads: int = None  # 최근 30일 다운로드 수
+    fields: dict = field(default_factory=dict)  # bibrec의 모든 행: 머리글 -> 값 목록
+    format_links: dict = field(default_factory=dict)  # MIME 타입 -> 다운로드 URL
+
+    def download_url(self, formats):
+        """formats(MIME 타입) 순서로 페이지에 나열된 첫 파일 링크를 반환합니다. 없으면 None입니다."""
+        for mime_type in formats:
+            if mime_type in self.format_links:
+                return self.format_links[mime_type]
+        return None
+
+    def as_record(self):
+        """싱크에 바로 넘길 수 있는 레코드(dict). 열 이름은 sinks의 열 이름과 같습니다.
+
+        Creators는 "역할: 이름 (생년-몰년)"을, Formats는 MIME 타입 -> URL을 JSON 문자열로 담습니다.
+        """
+        return {
+            'ID': self.book_id,
+            'Title': self.title,
+            'Author': '; '.join(self.authors) or "Unknown Author",
+            'Creators': '; '.join(format_creator(creator) for creator in self.creators),
+            'Year': self.release_year,
+            'Language': self.language,
+            'Release Date': self.release_date,
+            'Subjects': '; '.join(self.subjects),
+            'LoC Class': self.loc_class,
+            'Downloads': self.downloads,
+            'Formats': json.dumps(self.format_links, ensure_ascii=False),
+        }
+
+
+def _clean(text):
+    return ' '.join(text.split()) if text else ''
+
+
+def _year(text):
+    year_match = re.search(r'\d{4}', text)
+    return year_match.group(0) if year_match else "Unknown"
+
+
+def parse_creator(role, value):
+    """"성, 이름, 생년-몰년" 형식의 값을 {'role', 'name', 'birth', 'death'}로 나눕니다."""
+    match = _LIFE_DATES.search(value)
+    if match and (match.group('birth') or match.group('death')):
+        return {'role': role, 'name': value[:match.start()], 'birth': match.group('birth') or None,
+                'death': match.group('death') or None}
+    return {'role': role, 'name': value, 'birth': None, 'death': None}
+
+
+def format_creator(creator):
+    """parse_creator의 결과를 "Author: Shelley, Mary Wollstonecraft (1797-1851)" 형식으로 되돌립니다."""
+    text = f"{creator['role']}: {creator['name']}"
+    if creator['birth'] or creator['death']:
+        text += f" ({creator['birth'] or ''}-{creator['death'] or ''})"
+    return text
+
+
+def _build_page(book_id, rows, links):
+    """(th, td) 텍스트 쌍과 (type, href) 쌍으로 BookPage를 만듭니다."""
+    page = BookPage(book_id=str(book_id))
+    languages = []
+    for header, value in rows:
+        page.fields.setdefault(header, []).append(value)
+        if header == 'Title':
+            page.title = value
+        elif header == 'Language':
+            languages.append(value)
+        elif header == 'Release Date':
+            page.release_date = value
+            page.release_year = _year(value)
+        elif header == 'Subject':
+            page.subjects.append(value)
+        elif header == 'LoC Class':
+            page.loc_class = value
+        elif header == 'Downloads':
+            match = _DOWNLOADS.search(value)
+            page.downloads = int(match.group(1).replace(',', '')) if match else None
+        elif header in CREATOR_ROLES or header.startswith('Author'):
+            if header in ('Author', 'Creator'):
+                page.authors.append(value)
+            page.creators.append(parse_creator(header, value))
+    if languages:
+        page.language = '; '.join(languages)
+    for mime_type, href in links:
+        if href and mime_type:
+            page.format_links.setdefault(mime_type.split(';')[0].strip(), urljoin(BASE_URL, href))
+    return page
+
+
+def _next_url(href):
+    return urljoin(BASE_URL, href) if href else None
+
+
+# --- selectolax ---
+
+def _search_selectolax(html):
+    tree = HTMLParser(html)
+    books = []
+    for item in tree.css('li.booklink'):
+        link = item.css_first('a')
+        if link is None or not link.attributes.get('href'):
+            continue
+        title = item.css_first('span.title')
+        subtitle = item.css_first('span.subtitle')
+        books.append(BookLink(link.attributes['href'].split('/')[-1],
+                              _clean(title.text()) if title else "No Title",
+                              _clean(subtitle.text()) if subtitle else "Unknown Author"))
+    next_href = None
+    for link in tree.css('a'):
+        if link.text(strip=True) == 'Next':
+            next_href = link.attributes.get('href')
+            break
+    return books, _next_url(next_href)
+
+
+def _book_selectolax(html, book_id):
+    tree = HTMLParser(html)
+    rows = []
+    for row in tree.css('table.bibrec tr'):
+        header, value = row.css_first('th'), row.css_first('td')
+        if header is not None and value is not None:
+            rows.append((_clean(header.text()), _clean(value.text())))
+    links = [(link.attributes.get('type'), link.attributes.get('href')) for link in tree.css('table.files a.link')]
+    return _build_page(book_id, rows, links)
+
+
+# --- lxml ---
+
+_BOOKLINK_XPATH = "//li[contains(concat(' ', normalize-space(@class), ' '), ' booklink ')]"
+_SPAN_XPATH = ".//span[contains(concat(' ', normalize-space(@class), ' '), ' {} ')]"
+
+
+def _search_lxml(html):
+    tree = lxml.html.fromstring(html)
+    books = []
+    for item in tree.xpath(_BOOKLINK_XPATH):
+        hrefs = item.xpath('.//a/@href')
+        if not hrefs:
+            continue
+        title = item.xpath(_SPAN_XPATH.format('title'))
+        subtitle = item.xpath(_SPAN_XPATH.format('subtitle'))
+        books.append(BookLink(hrefs[0].split('/')[-1],
+                              _clean(title[0].text_content()) if title else "No Title",
+                              _clean(subtitle[0].text_content()) if subtitle else "Unknown Author"))
+    next_href = tree.xpath("//a[normalize-space(string())='Next']/@href")
+    return books, _next_url(next_href[0] if next_href else None)
+
+
+def _book_lxml(html, book_id):
+    tree = lxml.html.fromstring(html)
+    rows = []
+    for row in tree.xpath("//table[contains(concat(' ', normalize-space(@class), ' '), ' bibrec ')]//tr"):
+        header, value = row.find('th'), row.find('td')
+        if header is not None and value is not None:
+            rows.append((_clean(header.text_content()), _clean(value.text_content())))
+    links = [(link.get('type'), link.get('href')) for link in
+             tree.xpath("//table[contains(concat(' ', normalize-space(@class), ' '), ' files ')]"
+                        "//a[contains(concat(' ', normalize-space(@class), ' '), ' link ')]")]
+    return _build_page(book_id, rows, links)
+
+
+# --- BeautifulSoup (html.parser) ---
+
+def _search_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    books = []
+    for item in soup.select('li.booklink'):
+        if not item.a or not item.a.get('href'):
+            continue
+        title = item.select_one('span.title')
+        subtitle = item.select_one('span.subtitle')
+        books.append(BookLink(item.a['href'].split('/')[-1],
+                              _clean(title.get_text()) if title else "No Title",
+                              _clean(subtitle.get_text()) if subtitle else "Unknown Author"))
+    next_button = soup.find('a', string='Next')
+    return books, _next_url(next_button['href'] if next_button else None)
+
+
+def _book_bs4(html, book_id):
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = []
+    metadata_table = soup.find('table', class_='bibrec')
+    if metadata_table:
+        for row in metadata_table.find_all('tr'):
+            header, value = row.find('th'), row.find('td')
+            if header and value:
+                rows.append((_clean(header.get_text()), _clean(value.get_text())))
+    links = [(link.get('type'), link.get('href')) for link in soup.select('table.files a.link')]
+    return _build_page(book_id, rows, links)
+
+
+_PARSERS = {
+    'selectolax': (_search_selectolax, _book_selectolax),
+    'lxml': (_search_lxml, _book_lxml),
+    'html.parser': (_search_bs4, _book_bs4),
+}
+
+
+def parse_search_page(html, backend=None):
+    """검색 결과 페이지에서 (BookLink 목록, 다음 페이지 URL)을 반환합니다."""
+    return _PARSERS[backend or BACKEND][0](html)
+
+
+def parse_book_page(html, book_id, backend=None):
+    """책 페이지에서 BookPage를 반환합니다."""
+    return _PARSERS[backend or BACKEND][1](html, book_id)
+
+
+def available_backends():
+    backends = []
+    if HTMLParser is not None:
+        backends.append('selectolax')
+    if lxml is not None:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
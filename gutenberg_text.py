@@ -0,0 +1,107 @@
+import re
+import text_decoding
+
+# 내려받는 중인 본문 조각에서 Project Gutenberg 머리말/라이선스를 바로 걷어냅니다.
+# "*** START OF ..." 줄 이전과 "*** END OF ..." 줄 이후를 버리고, 줄바꿈은 \n으로 통일합니다.
+# 원문 전체를 메모리에 모았다가 다시 자르지 않으므로 큰 책도 정리된 본문만 남습니다.
+CHUNK_SIZE = 64 * 1024
+HEADER_LIMIT = 100_000  # 이 글자 수 안에 시작 표시가 없으면 머리말이 없는 책으로 봅니다.
+
+START_MARKER = re.compile(r'^\*{3}\s*START OF (THE|THIS) PROJECT GUTENBERG'
+                          r'|^\*END\*THE SMALL PRINT', re.IGNORECASE | re.MULTILINE)
+END_MARKER = re.compile(r'^\*{3}\s*END OF (THE|THIS) PROJECT GUTENBERG'
+                        r'|^End of (the )?Project Gutenberg', re.IGNORECASE | re.MULTILINE)
+
+_HEADER, _BODY, _FOOTER = 'header', 'body', 'footer'
+
+
+class BoilerplateStripper:
+    """feed(조각)을 반복해 부르고 마지막에 finish()를 부르면, 반환값을 이어 붙인 것이 본문입니다."""
+
+    def __init__(self, header_limit=HEADER_LIMIT):
+        self.header_limit = header_limit
+        self.found_start = False
+        self.found_end = False
+        self._state = _HEADER
+        self._pending = ''  # 아직 줄이 끝나지 않은 꼬리
+        self._header = []
+        self._header_size = 0
+
+    def feed(self, text):
+        text = self._pending + text
+        # \r\n이 두 조각에 걸쳐 있을 수 있으므로 끝의 \r은 다음 조각과 함께 처리합니다.
+        hold_cr = text.endswith('\r')
+        if hold_cr:
+            text = text[:-1]
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        cut = text.rfind('\n') + 1
+        self._pending = text[cut:] + ('\r' if hold_cr else '')
+        return self._process(text[:cut])
+
+    def finish(self):
+        tail = self._pending.replace('\r', '\n')
+        self._pending = ''
+        output = self._process(tail)
+        if self._state == _HEADER:
+            # 시작 표시가 없는 책은 모아 둔 내용을 그대로 본문으로 돌려줍니다.
+            self._state = _BODY
+            output = ''.join(self._header) + output
+            self._header = []
+        return output
+
+    def _process(self, block):
+        """완전한 줄들로 이루어진 block을 처리해 내보낼 본문을 반환합니다."""
+        if not block or self._state == _FOOTER:
+            return ''
+        if self._state == _BODY:
+            match = END_MARKER.search(block)
+            if match:
+                self._state = _FOOTER
+                self.found_end = True
+                return block[:match.start()]
+            return block
+        match = START_MARKER.search(block)
+        if match:
+            self._state = _BODY
+            self.found_start = True
+            self._header = []
+            line_end = block.find('\n', match.end())
+            return self._process(block[line_end + 1:] if line_end >= 0 else '')
+        self._header.append(block)
+        self._header_size += len(block)
+        if self._header_size > self.header_limit:
+            self._state = _BODY
+            buffered, self._header = ''.join(self._header), []
+            return self._process(buffered)
+        return ''
+
+
+def strip_boilerplate(text):
+    """이미 받은 문자열 전체에서 머리말/라이선스를 걷어냅니다."""
+    stripper = BoilerplateStripper()
+    return stripper.feed(text) + stripper.finish()
+
+
+def read_response(response, chunk_size=CHUNK_SIZE):
+    """requests 응답(stream=True)을 조각으로 읽으며 정리한 본문을 반환합니다."""
+    # requests의 .text/.encoding 대신 앞부분 바이트로 인코딩을 정합니다.
+    decoder = text_decoding.StreamDecoder(response.headers.get('Content-Type'))
+    stripper = BoilerplateStripper()
+    parts = []
+    for chunk in response.iter_content(chunk_size):
+        parts.append(stripper.feed(decoder.decode(chunk)))
+    parts.append(stripper.feed(decoder.finish()))
+    parts.append(stripper.finish())
+    return ''.join(parts)
+
+
+async def read_response_async(response, chunk_size=CHUNK_SIZE):
+    """aiohttp 응답을 조각으로 읽으며 정리한 본문을 반환합니다."""
+    decoder = text_decoding.StreamDecoder(response.headers.get('Content-Type'))
+    stripper = BoilerplateStripper()
+    parts = []
+    async for chunk in response.content.iter_chunked(chunk_size):
+        parts.append(stripper.feed(decoder.decode(chunk)))
+    parts.append(stripper.feed(decoder.finish()))
+    parts.append(stripper.finish())
+    return ''.join(parts)
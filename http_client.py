@@ -0,0 +1,53 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# 모든 크롤러가 공유하는 HTTP 클라이언트 설정
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+}
+MAX_CONNECTIONS = 100          # 전체 동시 연결 수 상한
+MAX_CONNECTIONS_PER_HOST = 10  # 호스트별 동시 연결 수 상한
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+KEEPALIVE_TIMEOUT = 30
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """keep-alive 커넥션 풀을 재사용하는 공유 requests 세션을 반환합니다."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # 호스트별로 풀을 유지하고, 풀이 가득 차면 새 연결 대신 반환을 기다립니다.
+            adapter = HTTPAdapter(pool_connections=MAX_CONNECTIONS // MAX_CONNECTIONS_PER_HOST,
+                                  pool_maxsize=MAX_CONNECTIONS_PER_HOST, pool_block=True)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update(HEADERS)
+            _session = session
+    return _session
+
+
+def get(url, **kwargs):
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    return get_session().get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    kwargs.setdefault('allow_redirects', True)
+    return get_session().head(url, **kwargs)
+
+
+def create_async_session(limit=MAX_CONNECTIONS, limit_per_host=MAX_CONNECTIONS_PER_HOST):
+    """같은 설정의 aiohttp 세션을 만듭니다. `async with`로 사용하세요."""
+    import aiohttp
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host,
+                                     keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=None, connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=timeout)
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import queue
+import threading
+import crawl_journal
+import gutenberg_parser
+import parse_pool
+import response_cache
+import retry_policy
+
+BOOKS_PER_PAGE = 25
+PREFETCH_PAGES = 4  # 작업자보다 앞서 미리 받아 둘 목록 페이지 수
+
+
+class IndexPageError(Exception):
+    """다시 시도해도 목록 페이지를 받지 못했습니다. 이 페이지를 빼고 센 결과는 믿을 수 없습니다."""
+
+
+def parse_index_page(html):
+    """검색 결과 페이지에서 책 목록(BookLink)과 다음 페이지 URL을 추출합니다."""
+    return gutenberg_parser.parse_search_page(html)
+
+
+def _fetch_page(url):
+    return response_cache.fetch(url).text
+
+
+def _start(index_url, journal):
+    """저널이 있으면 (시작 URL, 이미 끝난 책 ID, PageTracker)를 이어받습니다."""
+    if journal is None:
+        return index_url, set(), None
+    return journal.checkpoint() or index_url, journal.done_ids(), crawl_journal.PageTracker(journal)
+
+
+def run_pipeline(index_url, handler, workers=10, prefetch=PREFETCH_PAGES, fetch=_fetch_page, progress=None, sink=None,
+                 journal=None, stop_at=None):
+    """목록 페이지를 미리 받아 큐에 넣고, 고정된 작업자 스레드가 책을 계속 꺼내 처리합니다.
+
+    handler(book)의 결과 중 None이 아닌 것을 다운로드 순위 순서대로 반환합니다.
+    sink가 있으면 결과를 모으지 않고 끝나는 대로 sink에 기록하고 빈 목록을 반환합니다.
+    sink 쓰기가 실패하면 목록 읽기와 남은 책 처리를 멈추고 그 예외를 다시 던집니다.
+    journal이 있으면 마지막 체크포인트부터 다시 시작하고, 이미 끝난 책은 건너뜁니다.
+    stop_at(책 ID 집합)에 있는 책을 만나면 목록 읽기를 멈춥니다.
+    """
+    book_queue = queue.Queue(maxsize=prefetch * BOOKS_PER_PAGE)
+    results = []
+    results_lock = threading.Lock()
+    start_url, done, tracker = _start(index_url, journal)
+    exhausted = threading.Event()
+    stop = threading.Event()  # sink 쓰기가 실패하면 켭니다.
+    write_errors = []
+
+    def produce():
+        seen = set(done)
+        seq = 0
+        page = 0
+        url = start_url
+        try:
+            while url:
+                if stop.is_set():
+                    return
+                html = fetch(url)
+                if not html:
+                    logging.error(f"Failed to fetch index page {url}")
+                    return  # 목록이 끝난 것이 아니므로 체크포인트를 남겨 둡니다.
+                book_elements, next_url = parse_index_page(html)
+                if stop_at is not None:
+                    known = [i for i, book in enumerate(book_elements) if book.book_id in stop_at]
+                    if known:
+                        book_elements, next_url = book_elements[:known[0]], None
+                if not book_elements:
+                    break  # 책이 더 이상 없으면 중단합니다.
+                books = []
+                for book in book_elements:
+                    if book.book_id not in seen:
+                        seen.add(book.book_id)
+                        books.append(book)
+                if tracker is not None:
+                    tracker.add_page(page, url, len(books), next_url)
+                for book in books:
+                    book_queue.put((seq, book, page))
+                    seq += 1
+                page += 1
+                url = next_url
+            exhausted.set()
+        except Exception as e:
+            logging.error(f"Failed to fetch index page {url}: {e}")
+        finally:
+            for _ in range(workers):
+                book_queue.put(None)
+
+    def consume():
+        while True:
+            item = book_queue.get()
+            if item is None:
+                return
+            if stop.is_set():
+                continue  # 남은 항목은 처리하지 않고 비워서 목록을 읽는 스레드가 막히지 않게 합니다.
+            seq, book, page = item
+            try:
+                result = handler(book)
+            except Exception as e:
+                logging.error(f"Book ID {book.book_id}: Unhandled error, {e}")
+                result = None
+            if progress is not None:
+                progress.update(1)
+            if result and sink is not None:
+                try:
+                    sink.write(result)
+                except Exception as e:
+                    logging.error(f"Book ID {book.book_id}: Failed to write result, {e}")
+                    with results_lock:
+                        write_errors.append(e)
+                    stop.set()
+                    continue  # 기록하지 못한 책은 완료로 표시하지 않습니다.
+            elif result:
+                with results_lock:
+                    results.append((seq, result))
+            # sink에 기록한 뒤에 완료로 표시해야 중단되어도 빠지는 책이 없습니다.
+            if tracker is not None:
+                tracker.book_finished(page, book.book_id, crawl_journal.DONE if result else crawl_journal.FAILED)
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [threading.Thread(target=consume, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if write_errors:
+        raise write_errors[0]  # with sink 블록이 중단된 결과 파일을 내놓지 않도록 그대로 올립니다.
+    if tracker is not None and exhausted.is_set() and tracker.is_complete():
+        journal.finish()
+    return [result for _, result in sorted(results, key=lambda item: item[0])]
+
+
+async def run_pipeline_async(session, index_url, handler, fetch, workers=25, prefetch=PREFETCH_PAGES, sink=None,
+                             journal=None):
+    """run_pipeline의 asyncio 버전입니다. handler(session, book)과 fetch(session, url)은 코루틴입니다.
+
+    handler가 RetryLater를 던지면 그 책은 지연 재시도 큐로 옮기고 작업자는 다음 책을 처리합니다.
+    sink 쓰기가 실패하면 목록 읽기와 모든 작업자를 취소하고 그 예외를 다시 던집니다.
+    """
+    loop = asyncio.get_running_loop()
+    book_queue = asyncio.Queue(maxsize=prefetch * BOOKS_PER_PAGE)
+    results = []
+    start_url, done, tracker = _start(index_url, journal)
+    write_failed = loop.create_future()  # sink 쓰기에서 난 첫 예외를 담습니다.
+
+    async def produce():
+        seen = set(done)
+        seq = 0
+        page = 0
+        url = start_url
+        while url:
+            html = await fetch(session, url)
+            if not html:
+                logging.error(f"Failed to fetch index page {url}")
+                return False
+            book_elements, next_url = await parse_pool.run(gutenberg_parser.parse_search_page, html)
+            if not book_elements:
+                break
+            books = []
+            for book in book_elements:
+                if book.book_id not in seen:
+                    seen.add(book.book_id)
+                    books.append(book)
+            if tracker is not None:
+                tracker.add_page(page, url, len(books), next_url)
+            for book in books:
+                await book_queue.put((seq, book, page, 0))
+                seq += 1
+            page += 1
+            url = next_url
+        return True
+
+    async def requeue(item):
+        # 다시 넣은 뒤에 원래 항목을 완료 처리해야 join()이 먼저 끝나지 않습니다.
+        await book_queue.put(item)
+        book_queue.task_done()
+
+    async def consume():
+        while True:
+            seq, book, page, deferrals = await book_queue.get()
+            result = None
+            try:
+                result = await handler(session, book)
+            except retry_policy.RetryLater as e:
+                if deferrals < retry_policy.MAX_DEFERRALS:
+                    item = (seq, book, page, deferrals + 1)
+                    loop.call_later(e.delay, lambda item=item: asyncio.ensure_future(requeue(item)))
+                    continue
+                logging.error(f"Book ID {book.book_id}: Gave up after {deferrals} deferrals, {e}")
+            except Exception as e:
+                logging.error(f"Book ID {book.book_id}: Unhandled error, {e}")
+            else:
+                if result and sink is not None:
+                    try:
+                        # 파일 쓰기(Parquet 압축 포함)는 스레드에서 해서 다른 다운로드를 막지 않습니다.
+                        await asyncio.to_thread(sink.write, result)
+                    except Exception as e:
+                        logging.error(f"Book ID {book.book_id}: Failed to write result, {e}")
+                        if not write_failed.done():
+                            write_failed.set_result(e)
+                        book_queue.task_done()
+                        return  # 기록하지 못한 책은 완료로 표시하지 않습니다.
+                elif result:
+                    results.append((seq, result))
+            if tracker is not None:
+                tracker.book_finished(page, book.book_id, crawl_journal.DONE if result else crawl_journal.FAILED)
+            book_queue.task_done()
+
+    async def run():
+        exhausted = await produce()
+        await book_queue.join()
+        return exhausted
+
+    consumers = [asyncio.ensure_future(consume()) for _ in range(workers)]
+    runner = asyncio.ensure_future(run())
+    try:
+        await asyncio.wait([runner, write_failed], return_when=asyncio.FIRST_COMPLETED)
+        if write_failed.done():
+            # with sink 블록이 중단된 결과 파일을 내놓지 않도록 그대로 올립니다.
+            raise write_failed.result()
+        exhausted = runner.result()
+    finally:
+        runner.cancel()
+        for consumer in consumers:
+            consumer.cancel()
+        await asyncio.gather(runner, *consumers, return_exceptions=True)
+    if tracker is not None and exhausted and tracker.is_complete():
+        journal.finish()
+    return [result for _, result in sorted(results, key=lambda item: item[0])]
+
+
+async def fetch_book_ids(session, base_url, start_index, fetch):
+    """start_index 페이지의 책 ID 목록을 반환합니다. 목록이 끝나 비어 있는 페이지는 빈 목록입니다.
+
+    받지 못한 페이지(fetch가 None)는 빈 페이지로 치지 않고 retry_policy대로 다시 시도하며,
+    끝내 받지 못하면 IndexPageError를 던집니다. 그렇지 않으면 탐색이 일찍 끝나거나 페이지가 빠집니다.
+    """
+    url = f"{base_url}{start_index}"
+    for attempt in range(retry_policy.MAX_ATTEMPTS):
+        html = await fetch(session, url)
+        if html:
+            book_elements, _ = await parse_pool.run(gutenberg_parser.parse_search_page, html)
+            return [book.book_id for book in book_elements]
+        delay = retry_policy.next_delay(retry_policy.TRANSIENT, attempt)
+        if delay is None:
+            break
+        logging.warning(f"Failed to fetch index page {url}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+    raise IndexPageError(f"Failed to fetch index page {url}")
+
+
+async def find_last_offset(session, base_url, fetch):
+    """결과가 있는 마지막 start_index를 찾습니다. 없으면 None을 반환합니다.
+
+    페이지 번호를 두 배씩 늘려 빈 페이지를 찾은 뒤, 그 사이를 이분 탐색합니다.
+    받지 못한 페이지가 있으면 짧은 결과 대신 IndexPageError를 던집니다.
+    """
+    async def has_books(page):
+        return bool(await fetch_book_ids(session, base_url, 1 + page * BOOKS_PER_PAGE, fetch))
+
+    if not await has_books(0):
+        return None
+    low, high = 0, 1
+    while await has_books(high):
+        low, high = high, high * 2
+    # low 페이지는 결과가 있고 high 페이지는 비어 있습니다.
+    while high - low > 1:
+        middle = (low + high) // 2
+        if await has_books(middle):
+            low = middle
+        else:
+            high = middle
+    return 1 + low * BOOKS_PER_PAGE
+
+
+async def fan_out_offsets(session, base_url, fetch, concurrency=10):
+    """모든 목록 페이지를 동시에 받아 다운로드 순위 순서로 중복 없는 책 ID 목록을 반환합니다.
+
+    한 페이지라도 끝내 받지 못하면 IndexPageError를 던집니다.
+    """
+    last_offset = await find_last_offset(session, base_url, fetch)
+    if last_offset is None:
+        return []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_limited(start_index):
+        async with semaphore:
+            return await fetch_book_ids(session, base_url, start_index, fetch)
+
+    offsets = range(1, last_offset + 1, BOOKS_PER_PAGE)
+    pages = await asyncio.gather(*(fetch_limited(start_index) for start_index in offsets))
+    # gather는 입력 순서를 유지하므로 페이지 순서대로 합치면 순위가 보존됩니다.
+    return list(dict.fromkeys(book_id for page in pages for book_id in page))
@@ -0,0 +1,65 @@
+import argparse
+import hashlib
+import pyarrow.parquet as pq
+import sinks
+
+# sinks.ParquetSink로 저장한 코퍼스를 읽습니다.
+# 메타데이터는 본문 없이 읽고, 본문은 필요한 책이 든 row group의 Text 열만 메모리 매핑으로 읽습니다.
+
+
+def metadata_columns(path):
+    return [name for name in pq.ParquetFile(path).schema_arrow.names if name != 'Text']
+
+
+def read_metadata(path):
+    """Text 열을 빼고 메타데이터만 pandas DataFrame으로 읽습니다."""
+    return pq.read_table(path, columns=metadata_columns(path), memory_map=True).to_pandas()
+
+
+class CorpusReader:
+    def __init__(self, path):
+        self.path = path
+        self._file = pq.ParquetFile(path, memory_map=True)
+        self._locations = {}  # 책 ID -> (row group, row group 안의 위치)
+        for row_group in range(self._file.num_row_groups):
+            ids = self._file.read_row_group(row_group, columns=['ID']).column('ID').to_pylist()
+            for position, book_id in enumerate(ids):
+                self._locations[str(book_id)] = (row_group, position)
+
+    def __contains__(self, book_id):
+        return str(book_id) in self._locations
+
+    def __len__(self):
+        return len(self._locations)
+
+    def ids(self):
+        return list(self._locations)
+
+    def get_text(self, book_id, verify=False):
+        """책 ID의 본문을 반환합니다. 없으면 KeyError입니다. verify가 True이면 SHA256을 확인합니다."""
+        row_group, position = self._locations[str(book_id)]
+        columns = ['Text', 'SHA256'] if verify else ['Text']
+        table = self._file.read_row_group(row_group, columns=columns).slice(position, 1)
+        text = table.column('Text')[0].as_py()
+        if verify and hashlib.sha256((text or '').encode('utf-8')).hexdigest() != table.column('SHA256')[0].as_py():
+            raise ValueError(f"Book ID {book_id}: Text does not match its SHA256")
+        return text
+
+    def iter_texts(self):
+        """(ID, 본문)을 row group 하나씩 읽으며 돌려줍니다."""
+        for row_group in range(self._file.num_row_groups):
+            table = self._file.read_row_group(row_group, columns=['ID', 'Text'])
+            yield from zip(table.column('ID').to_pylist(), table.column('Text').to_pylist())
+
+
+def convert(source, target):
+    """기존 결과 파일(.tsv, .jsonl, .xlsx)을 Parquet 코퍼스로 변환합니다."""
+    sinks.rewrite(target, sinks.iter_records(source))  # 한 권씩 읽어 바로 row group으로 씁니다.
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source', help="기존 결과 파일 (.tsv, .jsonl, .xlsx)")
+    parser.add_argument('target', help="만들 Parquet 파일")
+    args = parser.parse_args()
+    convert(args.source, args.target)
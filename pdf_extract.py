@@ -0,0 +1,146 @@
+import os
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import PyPDF2
+from PyPDF2.errors import PyPdfError
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# PDF 본문 추출을 내려받기 작업자 밖으로 빼냅니다.
+# 작업자 스레드는 응답을 임시 파일로 흘려 쓰기만 하고, 페이지 추출은 프로세스 풀이 페이지 묶음 단위로 나눠 합니다.
+# 문서 하나가 풀을 오래 잡지 않도록 문서마다 시간 제한을 두고, 작업 프로세스마다 메모리 상한을 둡니다.
+TIMEOUT = float(os.environ.get('GUTENBERG_PDF_TIMEOUT', 300))  # 문서 하나의 추출 시간 제한(초)
+MEMORY_MB = int(os.environ.get('GUTENBERG_PDF_MEMORY_MB', 2048))  # 작업 프로세스 하나의 메모리 상한, 0이면 제한 없음
+SPILL_DIR = os.environ.get('GUTENBERG_PDF_SPILL_DIR') or None  # 없으면 시스템 임시 디렉터리
+PAGES_PER_TASK = 16
+CHUNK_SIZE = 1024 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+_reader = (None, None)  # 작업 프로세스에서 마지막으로 연 (경로, PdfReader)
+
+
+class ExtractError(Exception):
+    """시간/메모리 제한을 넘었거나 읽을 수 없는 PDF입니다."""
+
+
+def _init_worker(memory_bytes):
+    if memory_bytes and resource is not None:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker,
+                                            initargs=(MEMORY_MB * 1024 * 1024,))
+        return _executor
+
+
+def _reset_executor(broken):
+    """작업 프로세스가 죽어 풀이 망가졌으면 다음 문서는 새 풀에서 처리합니다."""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError("PDF extraction time limit exceeded")
+
+
+def _open(path):
+    global _reader
+    if _reader[0] != path:
+        _reader = (None, None)  # 이전 문서를 먼저 놓아 메모리를 돌려받습니다.
+        _reader = (path, PyPDF2.PdfReader(path))
+    return _reader[1]
+
+
+def _run(deadline, func, *args):
+    """작업 프로세스에서 실행됩니다. 남은 시간이 지나면 SIGALRM으로 추출을 끊습니다."""
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise TimeoutError("PDF extraction time limit exceeded")
+    if not hasattr(signal, 'setitimer'):
+        return func(*args)
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _page_count(path):
+    return len(_open(path).pages)
+
+
+def _start_document(timeout, path):
+    """문서의 첫 작업입니다. 시간 제한은 풀에서 기다린 시간을 빼고 여기서부터 잽니다."""
+    deadline = time.time() + timeout
+    return _run(deadline, _page_count, path), deadline
+
+
+def _extract_pages(path, start, stop):
+    pages = _open(path).pages
+    return [pages[index].extract_text() or '' for index in range(start, min(stop, len(pages)))]
+
+
+def spill(response, chunk_size=CHUNK_SIZE):
+    """requests 응답(stream=True)을 임시 파일로 받고 경로를 반환합니다. 다 쓴 뒤 지우는 것은 호출한 쪽 몫입니다."""
+    with tempfile.NamedTemporaryFile('wb', suffix='.pdf', dir=SPILL_DIR, delete=False) as file:
+        try:
+            for chunk in response.iter_content(chunk_size):
+                file.write(chunk)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    return file.name
+
+
+def iter_pages(path, timeout=TIMEOUT, pages_per_task=PAGES_PER_TASK):
+    """PDF 파일의 페이지 텍스트를 순서대로 돌려줍니다. 앞 페이지가 끝나는 대로 바로 내보냅니다."""
+    executor = get_executor()
+    futures = []
+    try:
+        # 다른 문서의 작업 뒤에서 기다리는 동안은 제한 시간에 넣지 않습니다. 첫 작업 자체는 작업 프로세스의 알람이 끊습니다.
+        count, deadline = executor.submit(_start_document, timeout, path).result()
+        futures = [executor.submit(_run, deadline, _extract_pages, path, start, start + pages_per_task)
+                   for start in range(0, count, pages_per_task)]
+        for future in futures:
+            # 작업 프로세스 안의 알람이 먼저 끊으므로, 여기서는 여유를 조금 더 둡니다.
+            yield from future.result(timeout=max(deadline - time.time(), 0) + 5)
+    except BrokenProcessPool as e:
+        _reset_executor(executor)
+        raise ExtractError(f"PDF worker died (memory limit {MEMORY_MB} MB?): {path}") from e
+    except (TimeoutError, MemoryError, PyPdfError) as e:
+        raise ExtractError(f"{type(e).__name__}: {e}") from e
+    except Exception as e:
+        # 망가진 PDF에서 PyPDF2는 PyPdfError가 아닌 예외(ValueError, KeyError, struct.error 등)도 던집니다.
+        raise ExtractError(f"Unreadable PDF ({type(e).__name__}: {e})") from e
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_file(path, timeout=TIMEOUT):
+    """spill로 받은 PDF 파일의 본문을 페이지 사이에 공백을 넣어 반환하고 파일을 지웁니다. 실패하면 ExtractError입니다.
+
+    응답을 닫은 뒤에 부르면 추출하는 동안 연결을 붙잡지 않습니다.
+    """
+    try:
+        return ' '.join(iter_pages(path, timeout))
+    finally:
+        os.remove(path)
@@ -1,108 +1,42 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor
-import re
-import os
+import delta_crawl
+import text_clean
+import catalog
+import book_metadata
+import url_cache
 import logging
-import PyPDF2
-from io import BytesIO
 
 # 로깅 설정
 logging.basicConfig(filename='download_books.log', level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
 
-def get_book_data(book_id):
-    base_url = f"https://www.gutenberg.org/files/{book_id}"
-    urls = [
-        f"{base_url}/{book_id}-0.txt",
-        f"{base_url}/{book_id}.txt",
-        f"{base_url}/{book_id}-0.txt.utf8",
-        f"{base_url}/{book_id}-pdf.pdf"
-    ]
-    try:
-        with requests.Session() as session:
-            for url in urls:
-                response = session.get(url)
-                if response.status_code == 200:
-                    if 'pdf' in url:
-                        with BytesIO(response.content) as f:
-                            reader = PyPDF2.PdfReader(f)
-                            text = [page.extract_text() for page in reader.pages]
-                            return ' '.join(text) if text else ''
-                    else:
-                        return response.text
-    except requests.RequestException as e:
-        logging.error(f"Book ID {book_id}: Failed to download text, {e}")
-    logging.warning(f"Book ID {book_id}: All URL patterns failed.")
-    return None
+# 본문으로 받을 형식의 우선순위. 텍스트가 없으면 PDF에서 추출합니다.
+FORMATS = ('text/plain', 'application/pdf')
 
-def get_book_metadata(book_id):
-    url = f"https://www.gutenberg.org/ebooks/{book_id}"
-    try:
-        with requests.Session() as session:
-            response = session.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            metadata_table = soup.find('table', class_='bibrec')
-            year = "Unknown"
-            if metadata_table:
-                for row in metadata_table.find_all('tr'):
-                    if 'Release Date' in row.find('th').get_text() if row.find('th') else '':
-                        year_match = re.search(r'\d{4}', row.find('td').get_text() if row.find('td') else '')
-                        if year_match:
-                            year = year_match.group(0)
-                            break
-            return year
-    except requests.RequestException as e:
-        logging.error(f"Book ID {book_id}: Failed to retrieve metadata, {e}")
-        return "Unknown"
+def get_book_metadata(book_id, page=None):
+    # 책 페이지를 받았으면 그 페이지에서, 못 받았으면 로컬 카탈로그에서 읽습니다.
+    if page is not None:
+        return page.release_year
+    record = catalog.get_metadata(book_id)
+    return record['year'] if record else "Unknown"
 
 def download_books(book):
-    title = book.select_one('span.title').text if book.select_one('span.title') else "No Title"
-    author = book.select_one('span.subtitle').text if book.select_one('span.subtitle') else "Unknown Author"
-    book_id = book.a['href'].split('/')[-1]
-    text = get_book_data(book_id)
-    year = get_book_metadata(book_id)
+    title = book.title
+    author = book.subtitle
+    book_id = book.book_id
+    # 책 페이지 한 번으로 bibrec 전체와 실제 파일 링크를 함께 얻습니다.
+    page = book_metadata.get_book_page(book_id)
+    text = book_metadata.get_book_text(book_id, page, FORMATS)
+    year = get_book_metadata(book_id, page)
     if text:
-        return {
-            'ID': book_id,
-            'Title': title,
-            'Author': author,
+        # 목록의 제목/저자는 책 페이지를 받지 못했을 때만 씁니다. 페이지의 저자에는 생몰년이 붙어 있습니다.
+        result = {'ID': book_id, 'Title': title, 'Author': author}
+        if page is not None:
+            result.update(page.as_record())
+        result.update({
             'Year': year,
-            'Text': text
-        }
-
-def get_books_list():
-    index_url = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en"
-    books = []
-    while True:
-        response = requests.get(index_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        book_elements = soup.select('li.booklink')
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            results = list(tqdm(executor.map(download_books, book_elements), total=len(book_elements), desc="Downloading books"))
-            books.extend([result for result in results if result])
-        next_button = soup.find('a', string='Next')
-        if next_button:
-            index_url = "https://www.gutenberg.org" + next_button['href']
-        else:
-            break
-    return books
-
-def clean_text(text):
-    """Remove or replace illegal characters that might cause Excel to fail."""
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)  # ASCII 외 문자 제거
-    text = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', text)  # 제어 문자 제거
-    return text
-
-def save_to_excel(books):
-    df = pd.DataFrame(books)
-    df['Text'] = df['Text'].apply(clean_text)
-    df.to_excel('gutenberg_books.xlsx', index=False, engine='openpyxl')
+            'URL': url_cache.get_resolved(book_id),
+            'Text': text_clean.clean_text(text)  # 엑셀에서 문제가 되는 문자는 기록 전에 정제합니다.
+        })
+        return result
 
 if __name__ == "__main__":
-    if not os.path.exists('gutenberg_books.xlsx'):
-        books = get_books_list()
-        save_to_excel(books)
-    else:
-        print("Data already downloaded.")
+    delta_crawl.main(download_books)
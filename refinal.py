@@ -1,109 +1,52 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor
-import re
-import os
+import delta_crawl
+import text_clean
+import catalog
+import book_metadata
+import url_cache
 import logging
 
 # 로깅 설정
 logging.basicConfig(filename='download_books.log', level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
 
-def get_book_data(book_id):
-    base_url = f"https://www.gutenberg.org/files/{book_id}"
-    urls = [
-        f"{base_url}/{book_id}-0.txt",
-        f"{base_url}/{book_id}.txt",
-        f"{base_url}/{book_id}-0.txt.utf8",
-        f"{base_url}/{book_id}-pdf.pdf",
-        f"https://www.gutenberg.org/ebooks/{book_id}.txt.utf-8",
-        f"https://www.gutenberg.org/ebooks/{book_id}.epub.noimages",
-        f"https://www.gutenberg.org/ebooks/{book_id}.html.noimages"
-    ]
-    try:
-        with requests.Session() as session:
-            for url in urls:
-                response = session.get(url)
-                if response.status_code == 200:
-                    return response.text
-    except requests.RequestException as e:
-        logging.error(f"Book ID {book_id}: Failed to download text, {e}")
-    logging.warning(f"Book ID {book_id}: All URL patterns failed.")
-    return None
-
-def get_book_metadata(book_id):
-    url = f"https://www.gutenberg.org/ebooks/{book_id}"
-    metadata = {'year': "Unknown", 'language': "Unknown"}
-    try:
-        with requests.Session() as session:
-            response = session.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            metadata_table = soup.find('table', class_='bibrec')
-            if metadata_table:
-                for row in metadata_table.find_all('tr'):
-                    th_text = row.find('th').get_text() if row.find('th') else ''
-                    td_text = row.find('td').get_text() if row.find('td') else ''
-                    if 'Release Date' in th_text:
-                        year_match = re.search(r'\d{4}', td_text)
-                        if year_match:
-                            metadata['year'] = year_match.group(0)
-                    if 'Language' in th_text:
-                        metadata['language'] = td_text.strip()
-    except requests.RequestException as e:
-        logging.error(f"Book ID {book_id}: Failed to retrieve metadata, {e}")
-    return metadata
+def get_book_metadata(book_id, page=None):
+    # 책 페이지를 받았으면 그 페이지에서, 못 받았으면 로컬 카탈로그에서 읽습니다.
+    if page is not None:
+        return {'year': page.release_year, 'language': page.language}
+    record = catalog.get_metadata(book_id)
+    if record:
+        return {'year': record['year'], 'language': record['language']}
+    return {'year': "Unknown", 'language': "Unknown"}
 
 def download_books(book):
-    book_id = book.a['href'].split('/')[-1]
-    metadata = get_book_metadata(book_id)
-    if metadata['language'].lower() != 'english':
+    book_id = book.book_id
+    # 로컬 카탈로그에 영어가 아닌 책으로 나와 있으면 책 페이지도 받지 않습니다.
+    record = catalog.get_metadata(book_id)
+    if record and not catalog.has_language(record['language']):
+        return None
+    # 책 페이지 한 번으로 bibrec 전체와 실제 파일 링크를 함께 얻습니다.
+    attempts = []
+    page = book_metadata.get_book_page(book_id, attempts)
+    if page is None and record is None:
+        book_metadata.record_page_failure(book_id, attempts)
+        return None
+    metadata = get_book_metadata(book_id, page)
+    if not catalog.has_language(metadata['language']):
         return None  # 영어가 아닌 책은 건너뜁니다.
-    title = book.select_one('span.title').text if book.select_one('span.title') else "No Title"
-    author = book.select_one('span.subtitle').text if book.select_one('span.subtitle') else "Unknown Author"
-    text = get_book_data(book_id)
+    title = book.title
+    author = book.subtitle
+    text = book_metadata.get_book_text(book_id, page)
     if text:
-        return {
-            'ID': book_id,
-            'Title': title,
-            'Author': author,
+        # 목록의 제목/저자는 책 페이지를 받지 못했을 때만 씁니다. 페이지의 저자에는 생몰년이 붙어 있습니다.
+        result = {'ID': book_id, 'Title': title, 'Author': author}
+        if page is not None:
+            result.update(page.as_record())
+        result.update({
             'Year': metadata['year'],
-            'Text': text
-        }
-
-def get_books_list():
-    index_url = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en"
-    books = []
-    while True:
-        response = requests.get(index_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        book_elements = soup.select('li.booklink')
-        if not book_elements:
-            break  # 책이 더 이상 없으면 중단합니다.
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            results = list(tqdm(executor.map(download_books, book_elements), total=len(book_elements), desc="Downloading books"))
-            books.extend([result for result in results if result])
-        next_button = soup.find('a', string='Next')
-        if next_button:
-            index_url = "https://www.gutenberg.org" + next_button['href']
-        else:
-            break
-    return books
-
-def clean_text(text):
-    """Remove or replace illegal characters that might cause Excel to fail."""
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)  # ASCII 외 문자 제거
-    text = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', text)  # 제어 문자 제거
-    return text
-
-def save_to_excel(books):
-    df = pd.DataFrame(books)
-    df['Text'] = df['Text'].apply(clean_text)
-    df.to_excel('gutenberg_books.xlsx', index=False, engine='openpyxl')
+            'Language': metadata['language'],
+            'URL': url_cache.get_resolved(book_id),
+            'Text': text_clean.clean_text(text)  # 엑셀에서 문제가 되는 문자는 기록 전에 정제합니다.
+        })
+        return result
 
 if __name__ == "__main__":
-    if not os.path.exists('gutenberg_books.xlsx'):
-        books = get_books_list()
-        save_to_excel(books)
-    else:
-        print("Data already downloaded.")
+    delta_crawl.main(download_books)
@@ -0,0 +1,186 @@
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+import http_client
+
+# 책 페이지와 목록 페이지 응답을 디스크에 저장하고, 다음 실행에서는 조건부 요청으로 재검증합니다.
+CACHE_DIR = os.environ.get('GUTENBERG_HTTP_CACHE', 'http_cache')
+MAX_CACHE_BYTES = 2 * 1024 ** 3  # 압축된 본문 기준 캐시 최대 크기
+# 1이면 네트워크를 쓰지 않고 캐시에 있는 응답만 사용합니다.
+CACHE_ONLY = os.environ.get('GUTENBERG_CACHE_ONLY') == '1'
+
+# unchanged: 저장된 본문을 그대로 쓴 경우(304 또는 캐시 전용 모드) True입니다.
+CachedResponse = collections.namedtuple('CachedResponse', ['status', 'text', 'headers', 'unchanged'], defaults=(False,))
+
+_index = None  # 키 -> (압축 크기, 마지막 사용 시각)
+_total_bytes = 0
+_lock = threading.Lock()
+
+
+def _key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _paths(key):
+    directory = os.path.join(CACHE_DIR, key[:2])
+    return directory, os.path.join(directory, f"{key}.json"), os.path.join(directory, f"{key}.z")
+
+
+def _load_index():
+    global _index, _total_bytes
+    if _index is not None:
+        return
+    _index, _total_bytes = {}, 0
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for directory, _, filenames in os.walk(CACHE_DIR):
+        for filename in filenames:
+            if filename.endswith('.z'):
+                stat = os.stat(os.path.join(directory, filename))
+                _index[filename[:-2]] = (stat.st_size, stat.st_mtime)
+                _total_bytes += stat.st_size
+
+
+def _evict_locked():
+    """가장 오래 사용하지 않은 항목부터 지워 캐시 크기를 상한 아래로 맞춥니다."""
+    global _total_bytes
+    if _total_bytes <= MAX_CACHE_BYTES:
+        return
+    for key, (size, _) in sorted(_index.items(), key=lambda item: item[1][1]):
+        _, meta_path, body_path = _paths(key)
+        for path in (meta_path, body_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        del _index[key]
+        _total_bytes -= size
+        if _total_bytes <= MAX_CACHE_BYTES * 0.9:
+            break
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def lookup(url):
+    """저장된 응답의 메타데이터(dict)를 반환합니다. 없으면 None입니다."""
+    key = _key(url)
+    _, meta_path, body_path = _paths(key)
+    if not os.path.exists(body_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    entry['key'] = key
+    return entry
+
+
+def load_text(entry):
+    """저장된 본문을 반환합니다. 그사이 캐시 정리로 지워졌거나 손상되었으면 None입니다."""
+    _, _, body_path = _paths(entry['key'])
+    now = time.time()
+    try:
+        with open(body_path, 'rb') as file:
+            body = zlib.decompress(file.read())
+        os.utime(body_path, (now, now))  # LRU 순서를 위해 사용 시각을 갱신합니다.
+    except (OSError, zlib.error):
+        return None
+    with _lock:
+        _load_index()
+        if entry['key'] in _index:
+            _index[entry['key']] = (_index[entry['key']][0], now)
+    return body.decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def store(url, body, headers, encoding=None):
+    """응답 본문을 압축해 저장합니다. body는 bytes입니다."""
+    global _total_bytes
+    key = _key(url)
+    directory, meta_path, body_path = _paths(key)
+    os.makedirs(directory, exist_ok=True)
+    compressed = zlib.compress(body, 6)
+    _write_atomic(body_path, compressed)
+    entry = {
+        'url': url,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'encoding': encoding or 'utf-8',
+        'stored_at': time.time(),
+    }
+    _write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+    with _lock:
+        _load_index()
+        old_size = _index.get(key, (0, 0))[0]
+        _index[key] = (len(compressed), time.time())
+        _total_bytes += len(compressed) - old_size
+        _evict_locked()
+
+
+def _load(url):
+    """(메타데이터, 저장된 응답)을 반환합니다. 본문을 읽지 못하면 캐시 미스로 보고 (None, None)입니다.
+
+    본문을 요청 전에 읽어 두므로, 304를 받은 뒤에 캐시 정리가 본문을 지워도 문제가 없습니다.
+    """
+    entry = lookup(url)
+    if entry is None:
+        return None, None
+    text = load_text(entry)
+    if text is None:
+        return None, None
+    return entry, CachedResponse(200, text, {}, True)
+
+
+def _store_text(url, body, headers, encoding):
+    store(url, body, headers, encoding)
+    return body.decode(encoding, errors='replace')
+
+
+def fetch(url):
+    """http_client.get과 같지만 캐시를 사용합니다. 304 응답이면 저장된 본문을 돌려줍니다."""
+    entry, cached = _load(url)
+    if CACHE_ONLY:
+        # 캐시 전용 모드에서 없는 항목은 only-if-cached 요청처럼 504로 알립니다.
+        return cached or CachedResponse(504, None, {})
+    response = http_client.get(url, headers=conditional_headers(entry))
+    if response.status_code == 304 and cached:
+        return cached
+    if response.status_code == 200:
+        store(url, response.content, response.headers, response.encoding)
+        return CachedResponse(200, response.text, response.headers)
+    return CachedResponse(response.status_code, None, response.headers)
+
+
+async def fetch_async(session, url, **kwargs):
+    """fetch의 aiohttp 버전입니다. 디스크 읽기/쓰기와 압축은 스레드에서 해서 이벤트 루프를 막지 않습니다."""
+    entry, cached = await asyncio.to_thread(_load, url)
+    if CACHE_ONLY:
+        return cached or CachedResponse(504, None, {})
+    async with session.get(url, headers=conditional_headers(entry), **kwargs) as response:
+        if response.status == 304 and cached:
+            return cached
+        if response.status == 200:
+            body = await response.read()
+            text = await asyncio.to_thread(_store_text, url, body, response.headers, response.get_encoding())
+            return CachedResponse(200, text, response.headers)
+        return CachedResponse(response.status, None, response.headers)
@@ -0,0 +1,139 @@
+import asyncio
+import collections
+import email.utils
+import random
+import time
+from urllib.parse import urlparse
+
+# 응답 분류
+OK = 'ok'
+PERMANENT = 'permanent'    # 다시 시도해도 소용없는 응답 (404, 410 등)
+THROTTLE = 'throttle'      # 서버가 속도를 줄이라고 요청한 응답 (429, 503)
+TRANSIENT = 'transient'    # 일시적인 오류 (5xx, 타임아웃, 연결 오류)
+
+MAX_ATTEMPTS = 4
+BASE_DELAY = 1.0
+MAX_DELAY = 120.0
+DEFER_THRESHOLD = 5.0  # 이보다 오래 기다려야 하면 작업자를 붙잡지 않고 나중으로 미룹니다.
+MAX_DEFERRALS = 3
+
+
+class RetryLater(Exception):
+    """지금은 처리할 수 없으니 delay초 뒤에 다시 시도하라는 신호입니다."""
+
+    def __init__(self, url, delay):
+        super().__init__(f"Retry {url} in {delay:.1f}s")
+        self.url = url
+        self.delay = delay
+
+
+def classify(status):
+    """HTTP 상태 코드(연결 오류는 None)를 재시도 분류로 바꿉니다."""
+    if status is None:
+        return TRANSIENT
+    if 200 <= status < 400:
+        return OK
+    if status in (429, 503):
+        return THROTTLE
+    if status == 408 or status >= 500:
+        return TRANSIENT
+    return PERMANENT
+
+
+def retry_after(headers):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 반환합니다. 없으면 None입니다."""
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY):
+    """지수 백오프에 full jitter를 적용한 대기 시간입니다."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def next_delay(outcome, attempt, headers=None, max_attempts=MAX_ATTEMPTS):
+    """다시 시도하기 전 기다릴 시간을 반환합니다. 재시도하지 않아야 하면 None입니다."""
+    if outcome in (OK, PERMANENT) or attempt + 1 >= max_attempts:
+        return None
+    if outcome == THROTTLE:
+        delay = retry_after(headers)
+        if delay is not None:
+            return min(delay, MAX_DELAY)
+    return backoff_delay(attempt)
+
+
+class AIMDLimiter:
+    """호스트 하나의 동시 요청 수를 AIMD 방식으로 조절합니다.
+
+    성공할 때마다 한도를 조금씩 늘리고(additive increase),
+    서버가 속도 제한을 걸면 한도를 절반으로 줄입니다(multiplicative decrease).
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, increase=1.0, decrease=0.5, cooldown=1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters = collections.deque()
+
+    async def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # 깨어난 직후 취소되면 받은 자리를 다음 대기자에게 넘깁니다.
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self, status):
+        self.in_flight -= 1
+        outcome = classify(status)
+        if outcome == OK:
+            # 한도만큼 성공하면 한도가 1 늘어납니다.
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+        elif outcome == THROTTLE:
+            # 동시에 돌아온 429 응답들 때문에 한도가 연달아 줄지 않도록 잠시 간격을 둡니다.
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._last_decrease = now
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+_limiters = {}
+
+
+def get_limiter(url, **options):
+    """호스트별 제한기를 반환합니다. options(initial, maximum 등)는 처음 만들 때만 AIMDLimiter에 넘깁니다."""
+    host = urlparse(url).netloc
+    if host not in _limiters:
+        _limiters[host] = AIMDLimiter(**options)
+    return _limiters[host]
@@ -0,0 +1,300 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+
+# 크롤링 결과를 끝날 때까지 메모리에 모으지 않고, 책 하나가 끝날 때마다 바로 기록합니다.
+COLUMNS = ['ID', 'Title', 'Author', 'Year', 'Text']
+# 책 페이지(bibrec)에서 함께 읽는 열 (gutenberg_parser.BookPage.as_record)
+METADATA_COLUMNS = ['Creators', 'Release Date', 'Subjects', 'LoC Class', 'Downloads', 'Formats']
+# Parquet 코퍼스의 기본 열. Bytes와 SHA256은 Text에서 계산해 채웁니다.
+CORPUS_COLUMNS = ['ID', 'Title', 'Author', 'Year', 'Language', 'URL'] + METADATA_COLUMNS + ['Text']
+DERIVED_COLUMNS = ['Bytes', 'SHA256']
+ROW_GROUP_SIZE = 64  # Parquet/Excel 버퍼에 모아 둘 최대 책 수
+
+
+class Sink:
+    """모든 싱크의 공통 인터페이스. 여러 스레드에서 write를 불러도 안전합니다."""
+
+    def __init__(self, path, columns=COLUMNS):
+        self.path = path
+        self.columns = columns
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        with self._lock:
+            self._write(record)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def abort(self):
+        """예외로 중단될 때 부릅니다. 다 쓰지 못한 결과를 완성된 파일처럼 내놓지 않습니다."""
+        with self._lock:
+            self._abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _write(self, record):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def _abort(self):
+        # 이어 쓰는 형식은 이미 기록한 책이 저널과 맞으므로 그대로 닫습니다.
+        self._close()
+
+
+class JsonlSink(Sink):
+    def __init__(self, path, columns=COLUMNS):
+        super().__init__(path, columns)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, record):
+        self._file.write(json.dumps({column: record.get(column) for column in self.columns}, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class TsvSink(Sink):
+    def __init__(self, path, columns=COLUMNS):
+        super().__init__(path, columns)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file, delimiter='\t', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        if is_new:
+            self._writer.writerow(columns)
+
+    def _write(self, record):
+        self._writer.writerow([record.get(column, '') for column in self.columns])
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetSink(Sink):
+    """ROW_GROUP_SIZE권마다 row group 하나를 기록합니다. 완료되면 .part 파일을 제자리로 옮깁니다.
+
+    메타데이터 열은 앞에, 압축한 Text 열은 맨 뒤에 두어 분석할 때 본문을 읽지 않도록 합니다.
+    """
+
+    def __init__(self, path, columns=CORPUS_COLUMNS, row_group_size=ROW_GROUP_SIZE, compression='zstd'):
+        metadata = [column for column in columns if column != 'Text' and column not in DERIVED_COLUMNS]
+        has_text = 'Text' in columns
+        if has_text:
+            metadata += DERIVED_COLUMNS
+        super().__init__(path, metadata + (['Text'] if has_text else []))
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.int64() if column == 'Bytes' else pa.string()) for column in self.columns])
+        # 짧은 메타데이터 열만 사전 인코딩하고, 본문은 더 높은 압축 수준을 씁니다.
+        self._writer = pq.ParquetWriter(path + '.part', self._schema, compression=compression,
+                                        compression_level={'Text': 9} if has_text and compression == 'zstd' else None,
+                                        use_dictionary=metadata)
+        self._row_group_size = row_group_size
+        self._buffer = []
+
+    def _write(self, record):
+        if 'Text' in self.columns:
+            body = (record.get('Text') or '').encode('utf-8')
+            record = dict(record, Bytes=len(body), SHA256=hashlib.sha256(body).hexdigest())
+        self._buffer.append(record)
+        if len(self._buffer) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        columns = {}
+        for column in self.columns:
+            values = [record.get(column) for record in self._buffer]
+            columns[column] = values if column == 'Bytes' else [None if value is None else str(value) for value in values]
+        self._writer.write_table(self._pa.table(columns, schema=self._schema), row_group_size=self._row_group_size)
+        self._buffer = []
+
+    def _close(self):
+        self._flush()
+        self._writer.close()
+        os.replace(self.path + '.part', self.path)
+
+    def _abort(self):
+        self._buffer = []
+        try:
+            self._writer.close()
+        finally:
+            _remove(self.path + '.part')
+
+
+class XlsxSink(Sink):
+    """openpyxl write-only 모드로 행을 바로 임시 파일에 기록하고, 닫을 때 저장합니다."""
+
+    def __init__(self, path, columns=COLUMNS):
+        super().__init__(path, columns)
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(columns)
+
+    def _write(self, record):
+        self._sheet.append([record.get(column) for column in self.columns])
+
+    def _close(self):
+        self._workbook.save(self.path + '.part')
+        os.replace(self.path + '.part', self.path)
+
+    def _abort(self):
+        try:
+            self._sheet.close()  # 쓰다 만 시트 스트림을 끝내야 openpyxl 임시 파일이 정리됩니다.
+            _remove(self._sheet._writer.out)
+        finally:
+            _remove(self.path + '.part')
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_tree(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    else:
+        _remove(path)
+
+
+def _corpus_store(path, columns=CORPUS_COLUMNS):
+    """본문은 zstd 샤드 저장소(디렉터리)에, 나머지 열은 그 안의 metadata.jsonl에 넣습니다."""
+    import corpus_store
+    return corpus_store.CorpusStore(path, columns=columns)
+
+
+SINKS = {
+    '.jsonl': JsonlSink,
+    '.tsv': TsvSink,
+    '.parquet': ParquetSink,
+    '.xlsx': XlsxSink,
+    '.corpus': _corpus_store,
+}
+
+
+# 기존 파일 뒤에 이어 쓰는 형식. 중단된 크롤링은 이 형식에서만 이어서 할 수 있습니다.
+APPENDABLE = ('.jsonl', '.tsv', '.corpus')
+
+
+def is_appendable(path):
+    return os.path.splitext(path)[1].lower() in APPENDABLE
+
+
+def _default_columns(extension):
+    return CORPUS_COLUMNS if extension in ('.parquet', '.corpus') else COLUMNS
+
+
+def columns_for(path, columns=None):
+    """path에 쓸 열. columns가 없으면 형식별 기본 열입니다."""
+    return columns or _default_columns(os.path.splitext(path)[1].lower())
+
+
+def open_sink(path, columns=None):
+    """파일 확장자에 맞는 싱크를 엽니다. columns가 없으면 형식별 기본 열을 씁니다."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unsupported output format: {path}")
+    return SINKS[extension](path, columns_for(path, columns))
+
+
+def _is_zip(path):
+    with open(path, 'rb') as file:
+        return file.read(4) == b'PK\x03\x04'
+
+
+def iter_records(path, columns=None, batch_size=ROW_GROUP_SIZE):
+    """기존 결과 파일을 레코드(dict)로 하나씩 읽습니다. 파일 전체를 메모리에 올리지 않습니다.
+
+    columns를 주면 그 열만 읽습니다(Parquet는 나머지 열을 디스크에서 읽지도 않습니다).
+    """
+    if not os.path.exists(path):
+        return
+    extension = os.path.splitext(path)[1].lower()
+    # 예전 스크립트는 엑셀 파일을 .tsv 이름으로 저장하기도 했습니다.
+    if extension == '.tsv' and _is_zip(path):
+        extension = '.xlsx'
+    if extension == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    yield {name: record.get(name) for name in columns} if columns else record
+    elif extension == '.tsv':
+        csv.field_size_limit(sys.maxsize)  # Text 칸에는 책 한 권이 통째로 들어 있습니다.
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            for record in csv.DictReader(file, delimiter='\t', quotechar='"'):
+                yield {name: record.get(name) for name in columns} if columns else record
+    elif extension == '.parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield from batch.to_pylist()
+    elif extension == '.xlsx':
+        from openpyxl import load_workbook
+        # 경로 대신 파일 객체를 넘겨야 openpyxl이 .tsv 이름의 엑셀 파일도 엽니다.
+        with open(path, 'rb') as file:
+            workbook = load_workbook(file, read_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                header = next(rows, None) or []
+                for row in rows:
+                    record = dict(zip(header, row))
+                    yield {name: record.get(name) for name in columns} if columns else record
+            finally:
+                workbook.close()
+    elif extension == '.corpus':
+        import corpus_store
+        yield from corpus_store.iter_records(path, columns)
+    else:
+        raise ValueError(f"Unsupported output format: {path}")
+
+
+def read_records(path):
+    """기존 결과 파일을 레코드(dict) 목록으로 읽습니다. 파일이 없으면 빈 목록입니다."""
+    return list(iter_records(path))
+
+
+def rewrite(path, records, columns=None):
+    """records로 결과 파일 전체를 다시 씁니다. 다 쓴 뒤에 원래 파일과 바꿔치기합니다."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unsupported output format: {path}")
+    tmp_path = path + '.rewrite'
+    _remove_tree(tmp_path)  # 이어 쓰는 형식이 이전 임시 파일 뒤에 붙지 않도록 지웁니다.
+    with SINKS[extension](tmp_path, columns_for(path, columns)) as sink:
+        for record in records:
+            sink.write(record)
+    if os.path.isdir(path):
+        # 디렉터리(.corpus)는 덮어쓰며 바꿀 수 없으므로 원래 것을 옆으로 치운 뒤 바꾸고 지웁니다.
+        old_path = path + '.old'
+        _remove_tree(old_path)
+        os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path)
+    else:
+        os.replace(tmp_path, path)
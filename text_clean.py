@@ -0,0 +1,89 @@
+import codecs
+import itertools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# 책 본문에서 엑셀/TSV에서 문제가 되는 문자를 한 번의 순회로 정리합니다.
+# - ascii: 기존 clean_text와 같은 결과. ASCII가 아닌 문자열은 공백 하나로, 제어 문자(개행 포함)는 삭제
+# - unicode: 악센트 등 모든 문자를 그대로 두고, 탭/개행을 뺀 제어 문자와 짝 없는 서로게이트만 삭제
+ASCII = 'ascii'
+UNICODE = 'unicode'
+POLICY = os.environ.get('GUTENBERG_TEXT_POLICY', ASCII)
+CHUNK_CHARS = 4 * 1024 ** 2  # 병렬로 나눌 때 조각 하나의 대략적인 글자 수
+
+
+def _replace_run(error):
+    # ascii 인코더는 연속된 비ASCII 문자 전체를 한 번에 넘겨주므로 공백 하나로 바꿉니다.
+    return ' ', error.end
+
+
+codecs.register_error('gutenberg_clean', _replace_run)
+
+# str.translate(dict)는 글자마다 사전을 찾아 느리므로, 인코딩한 바이트에 삭제 표를 적용합니다.
+# UTF-8에서 0x00-0x7F 바이트는 항상 그 ASCII 문자 자체이므로 바이트 단위로 지워도 안전합니다.
+_ASCII_DELETE = bytes(range(0x20)) + b'\x7f'
+_UNICODE_DELETE = bytes(code for code in range(0x20) if chr(code) not in '\t\n\r') + b'\x7f'
+_C1_CONTROLS = re.compile(b'\xc2[\x80-\x9f]')  # U+0080-U+009F의 UTF-8 표현
+
+
+def clean_text(text, policy=None):
+    """본문을 정책에 맞게 정리합니다."""
+    if (policy or POLICY) == UNICODE:
+        # 짝 없는 서로게이트는 인코딩하면서 버립니다.
+        data = text.encode('utf-8', 'ignore').translate(None, _UNICODE_DELETE)
+        if b'\xc2' in data:
+            data = _C1_CONTROLS.sub(b'', data)
+        return data.decode('utf-8')
+    return text.encode('ascii', 'gutenberg_clean').translate(None, _ASCII_DELETE).decode('ascii')
+
+
+def _split_point(text, index):
+    """index 이후 첫 ASCII 문자 위치. 비ASCII 문자열 중간에서 자르면 공백이 두 개가 되기 때문입니다."""
+    while index < len(text) and ord(text[index]) > 0x7f:
+        index += 1
+    return index
+
+
+def split_chunks(text, size=CHUNK_CHARS):
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = _split_point(text, start + size)
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def clean_stream(chunks, policy=None):
+    """문자열 조각을 차례로 받아 정리한 조각을 돌려줍니다. 조각 끝의 비ASCII 문자열은 다음 조각과 합칩니다."""
+    carry = ''
+    for chunk in chunks:
+        chunk = carry + chunk
+        end = len(chunk)
+        while end > 0 and ord(chunk[end - 1]) > 0x7f:
+            end -= 1
+        chunk, carry = chunk[:end], chunk[end:]
+        if chunk:
+            yield clean_text(chunk, policy)
+    if carry:
+        yield clean_text(carry, policy)
+
+
+def clean_many(texts, policy=None, workers=None, chunksize=8):
+    """여러 본문을 프로세스 풀에서 나눠 정리합니다. 결과 순서는 입력과 같습니다."""
+    policy = policy or POLICY
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        yield from executor.map(clean_text, texts, itertools.repeat(policy), chunksize=chunksize)
+
+
+def clean_large(text, policy=None, workers=None):
+    """아주 큰 본문 하나를 조각으로 나눠 병렬로 정리합니다."""
+    return ''.join(clean_many(split_chunks(text), policy, workers, chunksize=1))
+
+
+def clean_series(series, policy=None, workers=None):
+    """pandas Series(예: df['Text'])를 정리한 새 Series를 반환합니다."""
+    import pandas as pd
+    texts = series.fillna('').tolist()
+    return pd.Series(list(clean_many(texts, policy, workers)), index=series.index, name=series.name)
@@ -0,0 +1,150 @@
+import codecs
+import collections
+import re
+import threading
+
+# 본문 바이트의 인코딩을 앞부분만 보고 정한 뒤, 받는 대로 조금씩 디코드합니다.
+# 정하는 순서: BOM > Gutenberg 머리말의 "Character set encoding:" 줄 > Content-Type charset > 앞부분 탐지
+# 선언된 인코딩으로 앞부분이 디코드되지 않으면 그 선언은 무시합니다. 또 ISO-8859-1 같은 1바이트 인코딩은
+# 어떤 바이트든 디코드되므로, 앞부분이 멀티바이트 문자가 있는 올바른 UTF-8이면 선언보다 UTF-8을 우선합니다.
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    from_bytes = None
+
+PREFIX_BYTES = 16 * 1024  # 인코딩을 정할 때 볼 앞부분 크기
+# 선언이 없고 UTF-8도 아닌 영어 책은 거의 Windows-1252/ISO-8859-1입니다.
+# 범용 탐지기는 짧은 앞부분에서 이를 cp1250 등으로 잘못 고르는 일이 많아 먼저 확인합니다.
+WESTERN_ENCODING = 'cp1252'
+FALLBACK_ENCODING = 'iso8859-1'  # 어떤 바이트든 디코드되는 마지막 선택
+
+_HEADER_LINE = re.compile(rb'Character set encoding:\s*([^\r\n]+)', re.IGNORECASE)
+_CONTENT_TYPE_CHARSET = re.compile(r'charset\s*=\s*"?([^";\s]+)', re.IGNORECASE)
+# Gutenberg 머리말에 쓰이는 표기 -> 코덱 이름
+_ALIASES = {
+    'ascii': 'utf-8',  # ASCII로 선언된 책에도 가끔 UTF-8 문자가 섞여 있습니다.
+    'us-ascii': 'utf-8',
+    'unicode utf-8': 'utf-8',
+    'iso latin-1': 'latin-1',
+    'iso-latin-1': 'latin-1',
+    'latin-1': 'latin-1',
+    'cp-1252': 'cp1252',
+}
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+_stats = collections.Counter()  # (인코딩, 근거) -> 책 수
+_replacements = collections.Counter()  # 인코딩 -> 디코드하지 못해 U+FFFD로 바꾼 글자 수
+_stats_lock = threading.Lock()
+
+
+def _normalize(name):
+    if not name:
+        return None
+    name = name.strip().strip('"\'').lower()
+    name = _ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def _decodes(prefix, encoding, final):
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(prefix, final=final)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect(prefix, content_type=None, final=False):
+    """앞부분 바이트로 (인코딩, 근거)를 정합니다. final이 True이면 prefix가 본문 전체입니다."""
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding, 'bom'
+    match = _HEADER_LINE.search(prefix)
+    declared = [(_normalize(match.group(1).decode('ascii', 'replace')) if match else None, 'header')]
+    match = _CONTENT_TYPE_CHARSET.search(content_type or '')
+    declared.append((_normalize(match.group(1)) if match else None, 'content-type'))
+    is_utf8 = _decodes(prefix, 'utf-8', final)
+    if is_utf8 and not prefix.isascii():
+        sources = [source for encoding, source in declared if encoding == 'utf-8']
+        return 'utf-8', sources[0] if sources else 'detected'
+    for encoding, source in declared:
+        if encoding and _decodes(prefix, encoding, final):
+            return encoding, source
+    if is_utf8:
+        return 'utf-8', 'detected'
+    if _decodes(prefix, WESTERN_ENCODING, final):
+        return WESTERN_ENCODING, 'detected'
+    if from_bytes is not None:
+        best = from_bytes(prefix).best()
+        encoding = _normalize(best.encoding) if best is not None else None
+        # BOM 없는 UTF-16/32는 Gutenberg 본문에 없으므로 짧은 앞부분에서 나온 오탐으로 봅니다.
+        if encoding and not encoding.startswith(('utf-16', 'utf-32')):
+            return encoding, 'detected'
+    return FALLBACK_ENCODING, 'fallback'
+
+
+class StreamDecoder:
+    """decode(바이트 조각)을 반복해 부르고 마지막에 finish()를 부르면 반환값을 이어 붙인 것이 본문입니다."""
+
+    def __init__(self, content_type=None, prefix_bytes=PREFIX_BYTES):
+        self.content_type = content_type
+        self.prefix_bytes = prefix_bytes
+        self.encoding = None
+        self.source = None
+        self.replacements = 0
+        self._prefix = []
+        self._prefix_size = 0
+        self._decoder = None
+
+    def _start(self, final):
+        prefix = b''.join(self._prefix)
+        self._prefix = []
+        self.encoding, self.source = detect(prefix[:self.prefix_bytes], self.content_type, final)
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        return self._decode(prefix, final)
+
+    def _decode(self, data, final=False):
+        text = self._decoder.decode(data, final=final)
+        self.replacements += text.count('\ufffd')
+        return text
+
+    def decode(self, chunk):
+        if self._decoder is not None:
+            return self._decode(chunk)
+        self._prefix.append(chunk)
+        self._prefix_size += len(chunk)
+        if self._prefix_size < self.prefix_bytes:
+            return ''
+        return self._start(final=False)
+
+    def finish(self):
+        text = self._start(final=True) if self._decoder is None else self._decode(b'', final=True)
+        with _stats_lock:
+            _stats[(self.encoding, self.source)] += 1
+            _replacements[self.encoding] += self.replacements
+        return text
+
+
+def decode(body, content_type=None):
+    """이미 받은 바이트 전체를 디코드합니다."""
+    decoder = StreamDecoder(content_type)
+    return decoder.decode(body) + decoder.finish()
+
+
+def report():
+    """지금까지 디코드한 책의 인코딩별 통계를 문자열로 반환합니다."""
+    with _stats_lock:
+        if not _stats:
+            return "No books decoded."
+        lines = []
+        for encoding in sorted({encoding for encoding, _ in _stats}):
+            sources = ', '.join(f"{source} {count}" for (name, source), count in sorted(_stats.items())
+                                if name == encoding)
+            lines.append(f"{encoding}: {sources}; replaced characters {_replacements[encoding]}")
+        return '\n'.join(lines)
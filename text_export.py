@@ -0,0 +1,91 @@
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from tqdm import tqdm
+import sinks
+
+# 결과 파일(.tsv, .jsonl, .parquet, .xlsx)의 본문을 책마다 .txt 파일로 내보냅니다.
+# 원본은 한 권씩 읽고, 쓰기는 정해진 수의 스레드가 나눠 합니다. 대기 중인 책 수에 상한이 있어서
+# 읽기가 쓰기보다 빨라도 코퍼스 전체가 메모리에 쌓이지 않습니다.
+#
+#   texts/
+#     000/1_Title.txt            ID 0-999
+#     012/12345_Title.txt        ID 12000-12999
+EXPORT_COLUMNS = ['ID', 'Title', 'Text']
+SHARD_DIGITS = 3  # 6자리로 채운 ID의 앞 3자리로 디렉터리를 나눕니다(디렉터리당 최대 1000권).
+TITLE_CHARS = 50
+WORKERS = 8
+
+
+def safe_title(title):
+    # 파일 이름 생성 시 특수 문자 제거 및 길이 제한
+    return ''.join(c for c in str(title or '') if c.isalnum() or c in " _.,")[:TITLE_CHARS].strip()
+
+
+def book_path(base_path, book_id, title):
+    book_id = str(book_id)
+    shard = book_id.zfill(6)[:SHARD_DIGITS]
+    return os.path.join(base_path, shard, f"{book_id}_{safe_title(title)}.txt")
+
+
+def write_atomic(path, text):
+    """임시 파일에 다 쓴 뒤 이름을 바꿔서, 중단되어도 반쯤 쓰인 .txt가 남지 않게 합니다."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+def _save(record, base_path, overwrite):
+    path = book_path(base_path, record['ID'], record['Title'])
+    if not overwrite and os.path.exists(path):
+        return False
+    write_atomic(path, record['Text'] or '')
+    return True
+
+
+def export(source, base_path='texts', workers=WORKERS, overwrite=False):
+    """source의 책을 base_path 아래로 내보내고 (저장한 수, 건너뛴 수, 실패한 수)를 반환합니다.
+
+    이미 있는 파일은 overwrite가 아니면 건너뛰므로, 중단된 내보내기를 다시 실행하면 이어서 합니다.
+    """
+    saved = skipped = failed = 0
+    pending = set()
+
+    def collect(done):
+        nonlocal saved, skipped, failed
+        for future in done:
+            progress.update(1)
+            try:
+                if future.result():
+                    saved += 1
+                else:
+                    skipped += 1
+            except (OSError, TypeError, KeyError) as e:
+                failed += 1
+                tqdm.write(f"Failed to save {future.book_id}: {e}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            tqdm(desc="Saving books", unit="book") as progress:
+        for record in sinks.iter_records(source, EXPORT_COLUMNS):
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = executor.submit(_save, record, base_path, overwrite)
+            future.book_id = record['ID']
+            pending.add(future)
+        collect(wait(pending).done)
+    return saved, skipped, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source', nargs='?', default='gutenberg_books.tsv',
+                        help="결과 파일 (.tsv, .jsonl, .parquet, .xlsx)")
+    parser.add_argument('--dir', default='texts', help="내보낼 디렉터리")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="동시에 파일을 쓸 스레드 수")
+    parser.add_argument('--overwrite', action='store_true', help="이미 있는 파일도 다시 씁니다")
+    args = parser.parse_args()
+    saved, skipped, failed = export(args.source, args.dir, args.workers, args.overwrite)
+    print(f"{saved} saved, {skipped} already exported, {failed} failed.")
@@ -0,0 +1,115 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+# 책 ID별로 실제 다운로드에 성공한 URL과, 404로 확인된 URL을 디스크에 저장합니다.
+CACHE_FILE = 'resolved_urls.json'
+MISSING_TTL = 7 * 24 * 3600  # 404 URL을 다시 시도하기 전까지 기다리는 시간(초)
+SAVE_EVERY = 50              # 변경이 이만큼 쌓이면 파일에 기록합니다.
+
+_resolved = None
+_missing = None
+_dirty = 0
+_lock = threading.Lock()
+
+
+def _load():
+    global _resolved, _missing
+    if _resolved is not None:
+        return
+    _resolved, _missing = {}, {}
+    if os.path.exists(CACHE_FILE):
+        try:
+            with open(CACHE_FILE, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            _resolved = data.get('resolved', {})
+            _missing = data.get('missing', {})
+        except (OSError, ValueError):
+            pass  # 손상된 캐시는 무시하고 새로 만듭니다.
+
+
+def _touch():
+    global _dirty
+    _dirty += 1
+    if _dirty >= SAVE_EVERY:
+        _save_locked()
+
+
+def _save_locked():
+    global _dirty
+    if _resolved is None or not _dirty:
+        return
+    tmp_path = CACHE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'resolved': _resolved, 'missing': _missing}, file)
+    os.replace(tmp_path, CACHE_FILE)
+    _dirty = 0
+
+
+def save():
+    with _lock:
+        _save_locked()
+
+
+def get_resolved(book_id):
+    with _lock:
+        _load()
+        return _resolved.get(str(book_id))
+
+
+def set_resolved(book_id, url):
+    with _lock:
+        _load()
+        if _resolved.get(str(book_id)) != url:
+            _resolved[str(book_id)] = url
+            _touch()
+
+
+def forget_resolved(book_id):
+    with _lock:
+        _load()
+        if _resolved.pop(str(book_id), None) is not None:
+            _touch()
+
+
+def is_missing(url):
+    with _lock:
+        _load()
+        checked_at = _missing.get(url)
+        if checked_at is None:
+            return False
+        if time.time() - checked_at > MISSING_TTL:
+            del _missing[url]
+            _touch()
+            return False
+        return True
+
+
+def mark_missing(url):
+    with _lock:
+        _load()
+        _missing[url] = time.time()
+        _touch()
+
+
+def order_candidates(book_id, urls):
+    """캐시된 URL을 맨 앞에 두고, 만료되지 않은 404 URL은 뺀 후보 목록을 반환합니다."""
+    resolved = get_resolved(book_id)
+    if resolved:
+        urls = [resolved] + [url for url in urls if url != resolved]
+    return [url for url in urls if url == resolved or not is_missing(url)]
+
+
+def record_status(book_id, url, status):
+    """후보 URL 요청 결과를 캐시에 반영합니다."""
+    if status == 200:
+        set_resolved(book_id, url)
+    elif status in (404, 410):
+        mark_missing(url)
+        if get_resolved(book_id) == url:
+            forget_resolved(book_id)
+
+
+atexit.register(save)
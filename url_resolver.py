@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import failure_ledger
+import retry_policy
+import url_cache
+
+PROBE_BUDGET = 4  # 책 하나당 동시에 보낼 HEAD 요청 수
+
+
+async def _probe_async(session, url):
+    limiter = retry_policy.get_limiter(url)
+    status = None
+    await limiter.acquire()
+    try:
+        async with session.head(url, allow_redirects=True) as response:
+            status = response.status
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logging.info(f"Probe failed for {url}: {e}")
+    finally:
+        limiter.release(status)
+    return status
+
+
+async def resolve_first_async(session, book_id, urls, budget=PROBE_BUDGET, attempts=None):
+    """후보 URL을 HEAD 요청으로 동시에 확인하고, 성공한 것 중 우선순위가 가장 높은 URL을 반환합니다.
+
+    캐시에 확인된 URL이 있으면 요청 없이 바로 반환합니다. 결정이 나면 남은 요청은 모두 취소합니다.
+    attempts 목록을 넘기면 확인한 URL과 상태 코드를 순서대로 덧붙입니다(실패 기록용).
+    """
+    cached_url = url_cache.get_resolved(book_id)
+    if cached_url:
+        return cached_url
+    urls = url_cache.order_candidates(book_id, urls)
+    semaphore = asyncio.Semaphore(budget)
+
+    async def probe(url):
+        async with semaphore:
+            return await _probe_async(session, url)
+
+    tasks = [asyncio.ensure_future(probe(url)) for url in urls]
+    try:
+        for url, task in zip(urls, tasks):
+            status = await task
+            url_cache.record_status(book_id, url, status)
+            if attempts is not None:
+                attempts.append(failure_ledger.attempt(url, status))
+            if status == 200:
+                return url
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,166 +1,162 @@
-import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-import pandas as pd
 from tqdm.asyncio import tqdm
-import re
-import os
 import logging
-import csv
-from aiohttp import ClientTimeout, ClientError
+import argparse
+import functools
+from aiohttp import ClientTimeout
+import http_client
+import crawl_journal
+import index_pipeline
+import sinks
+import text_clean
+import text_decoding
+import parse_pool
+import catalog
+import book_metadata
+import gutenberg_text
+import response_cache
+import retry_policy
+import failure_ledger
+import url_cache
 # 로깅 설정
 logging.basicConfig(filename='download_books.log', level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
 
-# User-Agent 설정
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'
-}
+async def fetch_text(session, url, defer=False, cache=False, strip=False, attempts=None):
+    """url의 본문을 가져옵니다. 404/410은 재시도하지 않고, 429/503은 Retry-After를 따릅니다.
 
-async def fetch_text(session, url):
-    retries = 3
+    defer가 True이면 오래 기다려야 하는 재시도는 RetryLater로 호출자에게 넘겨
+    작업자가 그동안 다른 책을 처리하도록 합니다. cache가 True이면 응답 캐시로 재검증합니다.
+    strip이 True이면 받는 동안 Gutenberg 머리말/라이선스를 걷어내고 줄바꿈을 통일합니다.
+    attempts 목록을 넘기면 요청마다 URL과 상태 코드를 덧붙입니다(실패 기록용).
+    """
     timeout = ClientTimeout(total=60)  # 전체 요청 타임아웃을 60초로 설정
-    for attempt in range(retries):
+    limiter = retry_policy.get_limiter(url)
+    for attempt in range(retry_policy.MAX_ATTEMPTS):
+        status, response_headers = None, None
+        await limiter.acquire()
         try:
-            async with session.get(url, timeout=timeout) as response:
-                if response.status == 200:
-                    try:
-                        return await response.text()
-                    except UnicodeDecodeError:
-                        # UTF-8 디코드 실패 시 대체 인코딩 시도
-                        raw_text = await response.read()
-                        return raw_text.decode('ISO-8859-1')
-                else:
+            if cache:
+                cached = await response_cache.fetch_async(session, url, timeout=timeout)
+                status, response_headers = cached.status, cached.headers
+                if cached.status == 200:
+                    return cached.text
+                logging.error(f"Failed to fetch {url}: Status code {cached.status}")
+                if response_cache.CACHE_ONLY:
+                    return None  # 캐시 전용 모드에서는 다시 시도해도 결과가 같습니다.
+            else:
+                async with session.get(url, timeout=timeout) as response:
+                    status, response_headers = response.status, response.headers
+                    if response.status == 200 and strip:
+                        return await gutenberg_text.read_response_async(response)
+                    if response.status == 200:
+                        # 본문을 한 번만 읽고, 앞부분 바이트로 정한 인코딩으로 디코드합니다.
+                        return text_decoding.decode(await response.read(), response.headers.get('Content-Type'))
                     logging.error(f"Failed to fetch {url}: Status code {response.status}")
-                    continue  # 다음 시도를 위해 계속
+                    if response.status in (404, 410):
+                        url_cache.mark_missing(url)
         except asyncio.TimeoutError:
             logging.warning(f"Timeout occurred when fetching {url}")
         except Exception as e:
             logging.error(f"Error fetching {url}: {str(e)}")
-        if attempt < retries - 1:
-            await asyncio.sleep(2 ** attempt)  # 지수 백오프
+        finally:
+            limiter.release(status)
+            if attempts is not None:
+                attempts.append(failure_ledger.attempt(url, status))
+        # 동시 요청 슬롯을 반납한 뒤에 기다립니다.
+        delay = retry_policy.next_delay(retry_policy.classify(status), attempt, response_headers)
+        if delay is None:
+            return None
+        if defer and delay > retry_policy.DEFER_THRESHOLD:
+            raise retry_policy.RetryLater(url, delay)
+        await asyncio.sleep(delay)
     return None
 
-async def get_book_data(session, book_id):
-    base_url = f"https://www.gutenberg.org/files/{book_id}"
-    # 파일 확장자 및 버전을 다양화하여 순차적으로 시도
-    extensions = ["epub", "html", "pdf", "txt", "txt.utf8"]
-    for i in range(10):  # 가정: 0부터 9까지의 버전을 체크
-        for ext in extensions:
-            url = f"{base_url}/{book_id}-{i}.{ext}"
-            if ext in ["epub", "html"]:  # EPUB과 HTML의 경우 추가 변형을 고려
-                url_no_images = f"{base_url}/{book_id}-{i}.{ext}.noimages"
-                text = await fetch_text(session, url_no_images)
-                if text:
-                    logging.info(f"Found valid text at {url_no_images}")
-                    return text
-            text = await fetch_text(session, url)
-            if text:
-                logging.info(f"Found valid text at {url}")
-                return text
-            else:
-                logging.info(f"No valid text at {url}")
-    
-    # 버전 번호 없이 기본 파일명도 체크
-    for ext in extensions:
-        url = f"{base_url}/{book_id}.{ext}"
-        if ext in ["epub", "html"]:  # EPUB과 HTML의 경우 추가 변형을 고려
-            url_no_images = f"{base_url}/{book_id}.{ext}.noimages"
-            text = await fetch_text(session, url_no_images)
-            if text:
-                logging.info(f"Found valid text at {url_no_images}")
-                return text
-        text = await fetch_text(session, url)
-        if text:
-            logging.info(f"Found valid text at {url}")
-            return text
-        else:
-            logging.info(f"No valid text at {url}")
-
+async def get_book_data(session, book_id, page=None):
+    # 책 페이지에 나열된 파일을 확인 요청 없이 바로 받습니다.
+    url = book_metadata.download_url(book_id, page)
+    if not url:
+        logging.warning(f"Book ID {book_id}: All URL patterns failed.")
+        failure_ledger.record(book_id, [], "No text format listed on the book page")
+        return None
+    attempts = []
+    text = await fetch_text(session, url, defer=True, strip=True, attempts=attempts)
+    if text:
+        logging.info(f"Found valid text at {url}")
+        url_cache.set_resolved(book_id, url)
+        return text
     logging.warning(f"Book ID {book_id}: All URL patterns failed.")
+    failure_ledger.record(book_id, attempts, f"No valid text at {url}")
     return None
 
-async def get_book_metadata(session, book_id):
-    url = f"https://www.gutenberg.org/ebooks/{book_id}"
-    metadata = {'year': "Unknown", 'language': "Unknown"}
-    text = await fetch_text(session, url)
-    if text:
-        soup = BeautifulSoup(text, 'html.parser')
-        metadata_table = soup.find('table', class_='bibrec')
-        if metadata_table:
-            for row in metadata_table.find_all('tr'):
-                th_text = row.find('th').get_text() if row.find('th') else ''
-                td_text = row.find('td').get_text() if row.find('td') else ''
-                if 'Release Date' in th_text:
-                    year_match = re.search(r'\d{4}', td_text)
-                    if year_match:
-                        metadata['year'] = year_match.group(0)
-                if 'Language' in th_text:
-                    metadata['language'] = td_text.strip()
-    return metadata
+def get_book_metadata(book_id, page=None):
+    # 책 페이지를 받았으면 그 페이지에서, 못 받았으면 로컬 카탈로그에서 읽습니다.
+    if page is not None:
+        return {'year': page.release_year, 'language': page.language}
+    record = catalog.get_metadata(book_id)
+    if record:
+        return {'year': record['year'], 'language': record['language']}
+    return {'year': "Unknown", 'language': "Unknown"}
 
 async def download_books(session, book, progress):
-    book_id = book.a['href'].split('/')[-1]
-    metadata = await get_book_metadata(session, book_id)
-    if metadata['language'].lower() != 'english':
+    book_id = book.book_id
+    # 로컬 카탈로그에 영어가 아닌 책으로 나와 있으면 책 페이지도 받지 않습니다.
+    record = catalog.get_metadata(book_id)
+    if record and not catalog.has_language(record['language']):
         progress.update(1)
         return None
-    title = book.select_one('span.title').text if book.select_one('span.title') else "No Title"
-    author = book.select_one('span.subtitle').text if book.select_one('span.subtitle') else "Unknown Author"
-    text = await get_book_data(session, book_id)
+    # 책 페이지 한 번으로 bibrec 전체와 실제 파일 링크를 함께 얻습니다.
+    attempts = []
+    page = await book_metadata.get_book_page_async(
+        session, book_id, functools.partial(fetch_text, defer=True, cache=True, attempts=attempts))
+    if page is None and record is None:
+        book_metadata.record_page_failure(book_id, attempts)
+        progress.update(1)
+        return None
+    metadata = get_book_metadata(book_id, page)
+    if not catalog.has_language(metadata['language']):
+        progress.update(1)
+        return None
+    title = book.title
+    author = book.subtitle
+    text = await get_book_data(session, book_id, page)
+    if text:
+        text = await parse_pool.run(text_clean.clean_text, text)
     progress.update(1)
     if text:
-        return {
-            'ID': book_id,
-            'Title': title,
-            'Author': author,
+        # 목록의 제목/저자는 책 페이지를 받지 못했을 때만 씁니다. 페이지의 저자에는 생몰년이 붙어 있습니다.
+        result = {'ID': book_id, 'Title': title, 'Author': author}
+        if page is not None:
+            result.update(page.as_record())
+        result.update({
             'Year': metadata['year'],
+            'Language': metadata['language'],
+            'URL': url_cache.get_resolved(book_id),
             'Text': text
-        }
+        })
+        return result
 
-async def get_books_list():
+async def get_books_list(sink=None, journal=None):
     index_url = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en"
-    books = []
-    processed_books = set()  # 처리된 책의 ID를 저장할 세트
-    async with aiohttp.ClientSession(headers=headers) as session:
-        while True:
-            text = await fetch_text(session, index_url)
-            if text:
-                soup = BeautifulSoup(text, 'html.parser')
-                book_elements = soup.select('li.booklink')
-                if not book_elements:
-                    break
-                progress = tqdm(total=len(book_elements), desc="Downloading books")
-                tasks = []
-                for book in book_elements:
-                    book_id = book.a['href'].split('/')[-1]
-                    if book_id not in processed_books:
-                        tasks.append(download_books(session, book, progress))
-                        processed_books.add(book_id)
-                results = await asyncio.gather(*tasks)
-                books.extend([result for result in results if result])
-                progress.close()
-                next_button = soup.find('a', string='Next')
-                if next_button:
-                    index_url = "https://www.gutenberg.org" + next_button['href']
-                else:
-                    break
+    progress = tqdm(desc="Downloading books", unit="book")
+    async with http_client.create_async_session() as session:
+        # 목록 페이지는 미리 큐에 채우고, 고정된 작업자들이 중복 없이 책을 계속 꺼내 처리합니다.
+        books = await index_pipeline.run_pipeline_async(
+            session, index_url, functools.partial(download_books, progress=progress),
+            functools.partial(fetch_text, cache=True), workers=25, sink=sink, journal=journal)
+    progress.close()
     return books
 
-def clean_text(text):
-    """Remove or replace illegal characters that might cause issues."""
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-    text = re.sub(r'[\x00-\x1F\x7F-\x9F]+', '', text)
-    text = text.replace('\r', ' ').replace('\n', ' ').replace('\t', ' ')
-    return text
-
-def save_to_csv(books):
-    df = pd.DataFrame(books)
-    df['Text'] = df['Text'].apply(clean_text)
-    df.to_csv('gutenberg_books.tsv', sep='\t', index=False, encoding='utf-8', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-
 if __name__ == "__main__":
-    if not os.path.exists('gutenberg_books.tsv'):
-        books = asyncio.run(get_books_list())
-        save_to_csv(books)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', default='gutenberg_books.tsv', help="결과 파일 (.tsv, .jsonl, .parquet, .xlsx, .corpus)")
+    args = parser.parse_args()
+    journal = crawl_journal.for_output(args.output, sinks.is_appendable(args.output))
+    if journal is not None:
+        # 책이 끝날 때마다 바로 기록하므로 메모리 사용량은 동시 작업 수에만 비례합니다.
+        # Text는 다운로드 직후 프로세스 풀에서 이미 정제되었습니다.
+        # 중단되면 저널의 체크포인트부터 다시 시작하고, 이미 기록한 책은 건너뜁니다.
+        with journal, sinks.open_sink(args.output) as sink:
+            asyncio.run(get_books_list(sink, journal))
+        print(text_decoding.report())
     else:
         print("Data already downloaded.")
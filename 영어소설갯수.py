@@ -1,77 +1,133 @@
-import aiohttp
+import argparse
 import asyncio
-from bs4 import BeautifulSoup
+import math
+import random
+import sys
+import aiohttp
 from tqdm.asyncio import tqdm
+import book_metadata
+import http_client
+import index_pipeline
+import catalog
+import response_cache
+
+BASE_URL = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en&start_index="
 
 async def fetch_page(session, url):
-    async with session.get(url) as response:
-        if response.status == 200:
-            return await response.text()
-        else:
-            print(f"Failed to fetch {url}: Status code {response.status}")
-            return None
+    """페이지 본문을 반환합니다. 받지 못하면 None이고, 다시 시도할지는 호출한 쪽이 정합니다."""
+    try:
+        # 같은 페이지를 다시 받지 않도록 응답 캐시로 재검증합니다.
+        response = await response_cache.fetch_async(session, url)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+    if response.status == 200:
+        return response.text
+    else:
+        print(f"Failed to fetch {url}: Status code {response.status}")
+        return None
 
 async def count_books_on_page(session, base_url, start_index):
-    url = f"{base_url}{start_index}"
-    html = await fetch_page(session, url)
-    if not html:
-        print(f"No HTML returned for URL: {url}")
-        return 0
-    soup = BeautifulSoup(html, 'html.parser')
-    book_elements = soup.select('li.booklink a[href]')
-    if not book_elements:
-        print(f"No book links found at URL: {url}")
-        return 0
+    """start_index 목록 페이지의 (책 수, 그중 영어 책 수)를 반환합니다. 비어 있는 페이지는 (0, 0)입니다.
 
-    english_books_count = 0
-    for link in book_elements:
-        book_id = link['href'].split('/')[-1]
-        metadata_url = f"https://www.gutenberg.org/ebooks/{book_id}"
-        metadata_html = await fetch_page(session, metadata_url)
-        if metadata_html:
-            metadata_soup = BeautifulSoup(metadata_html, 'html.parser')
-            language_element = metadata_soup.find('table', class_='bibrec').find('th', string="Language").find_next_sibling('td')
-            if language_element and 'English' in language_element.text:
-                english_books_count += 1
-        else:
-            print(f"Failed to fetch metadata for book ID: {book_id}")
-
-    return english_books_count
+    목록 페이지를 끝내 받지 못하면 index_pipeline.IndexPageError를 던집니다.
+    """
+    book_ids = await index_pipeline.fetch_book_ids(session, base_url, start_index, fetch_page)
+    if not book_ids:
+        print(f"No book links found at URL: {base_url}{start_index}")
+        return 0, 0
+    # 카탈로그에 있는 책은 카탈로그로, 없으면 책 페이지를 받아 확인합니다.
+    results = await asyncio.gather(*(book_metadata.is_english_book(session, book_id, fetch_page)
+                                     for book_id in book_ids))
+    return len(book_ids), sum(results)
 
 async def get_total_english_books():
-    base_url = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en&start_index="
     start_index = 1
     total_english_books = 0
-    async with aiohttp.ClientSession() as session:
+    async with http_client.create_async_session() as session:
         while True:
-            url = f"{base_url}{start_index}"
-            response = await session.get(url)
-            if response.status == 400:
-                print(f"Failed to fetch page at start_index={start_index}: HTTP 400 Bad Request")
-                break
-            html = await response.text()
-            if not html:
-                print(f"No more pages to process, stopping at start_index={start_index}")
+            listed, english = await count_books_on_page(session, BASE_URL, start_index)
+            if not listed:
+                print(f"No more books found, stopping at start_index={start_index}")
                 break
-            soup = BeautifulSoup(html, 'html.parser')
-            book_elements = soup.select('li.booklink a[href]')
-            if not book_elements:
-                print("No more books found, stopping the process.")
-                break
-            for link in book_elements:
-                book_id = link['href'].split('/')[-1]
-                metadata_url = f"https://www.gutenberg.org/ebooks/{book_id}"
-                metadata_html = await fetch_page(session, metadata_url)
-                metadata_soup = BeautifulSoup(metadata_html, 'html.parser')
-                language_element = metadata_soup.find('table', class_='bibrec').find('th', string="Language").find_next_sibling('td')
-                if language_element and 'English' in language_element.text:
-                    total_english_books += 1
-            start_index += 25
-            print(f"Processed {start_index} books so far, total English books counted: {total_english_books}")
-
+            total_english_books += english
+            start_index += index_pipeline.BOOKS_PER_PAGE
+            print(f"Processed {start_index - 1} books so far, total English books counted: {total_english_books}")
     return total_english_books
 
+def wilson_interval(hits, n, z=1.96):
+    """표본 비율 hits/n의 95% Wilson 구간. 비율이 0이나 1에 가까워도 구간이 0으로 줄지 않습니다."""
+    if n == 0:
+        return 0.0, 1.0
+    p = hits / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+async def sample_language(session, base_url, total, sample, concurrency=10):
+    """순위에서 무작위로 sample권을 골라 언어를 확인하고 (표본 수, 영어 책 수)를 반환합니다."""
+    ranks = random.sample(range(total), min(sample, total))
+    pages = {}
+    for rank in ranks:
+        pages.setdefault(1 + rank // index_pipeline.BOOKS_PER_PAGE * index_pipeline.BOOKS_PER_PAGE, []).append(
+            rank % index_pipeline.BOOKS_PER_PAGE)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_ids(start_index):
+        async with semaphore:
+            return await index_pipeline.fetch_book_ids(session, base_url, start_index, fetch_page)
+
+    page_ids = await asyncio.gather(*(fetch_ids(start_index) for start_index in pages))
+    # 세는 동안 목록 순위가 조금 바뀌었으면 페이지 밖으로 밀려난 표본은 버립니다.
+    book_ids = [ids[position] for ids, positions in zip(page_ids, pages.values())
+                for position in positions if position < len(ids)]
+
+    async def check_language(book_id):
+        async with semaphore:
+            return await book_metadata.is_english_book(session, book_id, fetch_page)
+
+    results = await tqdm.gather(*(check_language(book_id) for book_id in book_ids), desc="Sampling languages")
+    return len(results), sum(results)
+
+async def get_total_english_books_fast(sample=0, concurrency=10):
+    """결과가 있는 마지막 목록 페이지를 이분 탐색으로 찾아 O(log N)번의 요청으로 셉니다.
+
+    검색 URL이 이미 languages=en으로 거르므로 (마지막 start_index - 1) + 마지막 페이지의 책 수가 답입니다.
+    sample이 있으면 그만큼의 책을 무작위로 골라 언어 칸을 확인하고 오차 추정을 출력합니다.
+    """
+    base_url = BASE_URL
+    async with http_client.create_async_session() as session:
+        last_offset = await index_pipeline.find_last_offset(session, base_url, fetch_page)
+        if last_offset is None:
+            return 0
+        last_page = await index_pipeline.fetch_book_ids(session, base_url, last_offset, fetch_page)
+        total = last_offset - 1 + len(last_page)
+        if sample:
+            checked, english = await sample_language(session, base_url, total, sample, concurrency)
+            low, high = wilson_interval(english, checked)
+            print(f"Language check: {english}/{checked} sampled books are English "
+                  f"(95% interval {low:.1%}-{high:.1%}, i.e. {round(total * low)}-{round(total * high)} books)")
+    return total
+
 if __name__ == "__main__":
-    total_english_books = asyncio.run(get_total_english_books())
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fan-out', action='store_true', help="목록 페이지를 동시에 가져옵니다")
+    parser.add_argument('--offline', action='store_true', help="네트워크 없이 로컬 카탈로그로 셉니다")
+    parser.add_argument('--fast', action='store_true', help="마지막 목록 페이지만 찾아서 셉니다 (요청 O(log N)번)")
+    parser.add_argument('--sample', type=int, default=0, help="--fast에서 언어를 확인할 표본 책 수")
+    args = parser.parse_args()
+    try:
+        if args.offline:
+            total_english_books = catalog.count_books('English')
+        elif args.fast:
+            total_english_books = asyncio.run(get_total_english_books_fast(args.sample))
+        elif args.fan_out:
+            total_english_books = asyncio.run(book_metadata.count_english_books_fan_out(BASE_URL, fetch_page))
+        else:
+            total_english_books = asyncio.run(get_total_english_books())
+    except index_pipeline.IndexPageError as e:
+        # 빠진 페이지를 뺀 합계는 틀린 답이므로 출력하지 않습니다.
+        sys.exit(f"Count failed, the listing could not be read completely: {e}")
     print(f"Total number of English books: {total_english_books}")
 
@@ -1,54 +1,63 @@
-import aiohttp
+import argparse
 import asyncio
-from bs4 import BeautifulSoup
-from tqdm.asyncio import tqdm
+import sys
+import book_metadata
+import http_client
+import catalog
+import index_pipeline
+import response_cache
+
+BASE_URL = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en&start_index="
 
 async def fetch_page(session, url):
     try:
-        async with session.get(url) as response:
-            if response.status == 200:
-                return await response.text()
-            else:
-                print(f"Failed to fetch {url}: Status code {response.status}")
-                return None
+        # 같은 페이지를 다시 받지 않도록 응답 캐시로 재검증합니다.
+        response = await response_cache.fetch_async(session, url)
+        if response.status == 200:
+            return response.text
+        else:
+            print(f"Failed to fetch {url}: Status code {response.status}")
+            return None
     except Exception as e:
         print(f"Error fetching {url}: {str(e)}")
         return None
 
-async def count_books_on_page(session, url):
-    html = await fetch_page(session, url)
-    if not html:
-        return 0  # No HTML means no books to count
-    soup = BeautifulSoup(html, 'html.parser')
-    book_elements = soup.select('li.booklink a[href]')
-    english_books_count = 0
-    for link in book_elements:
-        book_id = link['href'].split('/')[-1]
-        metadata_url = f"https://www.gutenberg.org/ebooks/{book_id}"
-        metadata_html = await fetch_page(session, metadata_url)
-        if metadata_html:
-            metadata_soup = BeautifulSoup(metadata_html, 'html.parser')
-            language_element = metadata_soup.find('table', class_='bibrec').find('th', string="Language").find_next_sibling('td')
-            if language_element and 'English' in language_element.text:
-                english_books_count += 1
-    return english_books_count
+async def count_books_on_page(session, start_index):
+    """목록 페이지의 (책 수, 그중 영어 책 수)를 반환합니다. 비어 있는 페이지는 (0, 0)입니다.
+
+    받지 못한 페이지는 다시 시도하고, 끝내 받지 못하면 index_pipeline.IndexPageError를 던집니다.
+    """
+    book_ids = await index_pipeline.fetch_book_ids(session, BASE_URL, start_index, fetch_page)
+    results = await asyncio.gather(*(book_metadata.is_english_book(session, book_id, fetch_page)
+                                     for book_id in book_ids))
+    return len(book_ids), sum(results)
 
 async def get_total_english_books():
-    base_url = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en&start_index="
     start_index = 1
     total_english_books = 0
-    async with aiohttp.ClientSession() as session:
+    async with http_client.create_async_session() as session:
         while True:
-            url = f"{base_url}{start_index}"
-            count = await count_books_on_page(session, url)
-            if count == 0:  # If no books are counted, stop the loop
-                print(f"No more books found or bad request, stopping at start_index={start_index}")
+            listed, english = await count_books_on_page(session, start_index)
+            if not listed:  # 영어 책이 없는 페이지가 아니라 책이 없는 페이지에서 멈춥니다.
+                print(f"No more books found, stopping at start_index={start_index}")
                 break
-            total_english_books += count
+            total_english_books += english
             start_index += 25
-            print(f"Processed {start_index} books so far, total English books counted: {total_english_books}")
+            print(f"Processed {start_index - 1} books so far, total English books counted: {total_english_books}")
     return total_english_books
 
 if __name__ == "__main__":
-    total_english_books = asyncio.run(get_total_english_books())
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fan-out', action='store_true', help="목록 페이지를 동시에 가져옵니다")
+    parser.add_argument('--offline', action='store_true', help="네트워크 없이 로컬 카탈로그로 셉니다")
+    args = parser.parse_args()
+    try:
+        if args.offline:
+            total_english_books = catalog.count_books('English')
+        elif args.fan_out:
+            total_english_books = asyncio.run(book_metadata.count_english_books_fan_out(BASE_URL, fetch_page))
+        else:
+            total_english_books = asyncio.run(get_total_english_books())
+    except index_pipeline.IndexPageError as e:
+        sys.exit(f"Count failed, the listing could not be read completely: {e}")
     print(f"Total number of English books: {total_english_books}")
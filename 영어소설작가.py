@@ -1,65 +1,64 @@
-import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
 import os
 import logging
+import http_client
+import book_metadata
+import catalog
+import gutenberg_parser
+import parse_pool
+import response_cache
 
 # 로깅 설정
 logging.basicConfig(filename='download_authors.log', level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
 
 async def fetch_text(session, url):
     try:
-        async with session.get(url) as response:
-            if response.status == 200:
-                return await response.text()
-            else:
-                logging.error(f"Failed to fetch {url}: Status code {response.status}")
-                return None
+        # 같은 페이지를 다시 받지 않도록 응답 캐시로 재검증합니다.
+        response = await response_cache.fetch_async(session, url)
+        if response.status == 200:
+            return response.text
+        else:
+            logging.error(f"Failed to fetch {url}: Status code {response.status}")
+            return None
     except Exception as e:
         logging.error(f"Error fetching {url}: {str(e)}")
         return None
 
 async def get_book_metadata(session, book_id):
-    url = f"https://www.gutenberg.org/ebooks/{book_id}"
+    # 로컬 카탈로그가 있으면 책 페이지를 받지 않고 바로 읽습니다.
+    record = catalog.get_metadata(book_id)
+    if record:
+        return {'author': record['author'], 'language': record['language']}
     metadata = {'author': "Unknown", 'language': "Unknown"}
-    text = await fetch_text(session, url)
-    if text:
-        soup = BeautifulSoup(text, 'html.parser')
-        metadata_table = soup.find('table', class_='bibrec')
-        if metadata_table:
-            for row in metadata_table.find_all('tr'):
-                th_text = row.find('th').get_text() if row.find('th') else ''
-                td_text = row.find('td').get_text() if row.find('td') else ''
-                if 'Author' in th_text:
-                    metadata['author'] = td_text.strip()
-                if 'Language' in th_text:
-                    metadata['language'] = td_text.strip()
+    page = await book_metadata.get_book_page_async(session, book_id, fetch_text)
+    if page is not None:
+        if page.authors:
+            metadata['author'] = page.authors[0]
+        metadata['language'] = page.language
     return metadata
 
 async def collect_authors(session, book):
-    book_id = book.a['href'].split('/')[-1]
+    book_id = book.book_id
     metadata = await get_book_metadata(session, book_id)
-    if metadata['language'].lower() == 'english':
+    if catalog.has_language(metadata['language']):
         return metadata['author']
     return None
 
 async def get_authors_list():
     index_url = "https://www.gutenberg.org/ebooks/search/?sort_order=downloads&languages=en"
     authors = []
-    async with aiohttp.ClientSession() as session:
+    async with http_client.create_async_session() as session:
         while True:
             text = await fetch_text(session, index_url)
             if text:
-                soup = BeautifulSoup(text, 'html.parser')
-                book_elements = soup.select('li.booklink')
-                if not book_elements:
+                book_links, next_url = await parse_pool.run(gutenberg_parser.parse_search_page, text)
+                if not book_links:
                     break
-                tasks = [collect_authors(session, book) for book in book_elements]
+                tasks = [collect_authors(session, book) for book in book_links]
                 results = await asyncio.gather(*tasks)
                 authors.extend([result for result in results if result])
-                next_button = soup.find('a', string='Next')
-                if next_button:
-                    index_url = "https://www.gutenberg.org" + next_button['href']
+                if next_url:
+                    index_url = next_url
                 else:
                     break
     return authors
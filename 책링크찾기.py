@@ -1,5 +1,12 @@
 import re
-import requests
+import argparse
+import asyncio
+import aiohttp
+import http_client
+import failure_ledger
+import parse_pool
+import url_cache
+import url_resolver
 from bs4 import BeautifulSoup
 import logging
 from tqdm import tqdm
@@ -7,8 +14,13 @@ from tqdm import tqdm
 # 로깅 설정
 logging.basicConfig(filename='check_books.log', level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
 
+# 크롤러가 failure_ledger에 남긴 책을 동시에 다시 찾아 봅니다.
+# 찾은 URL은 url_cache에 기록하고, refinal.py, pdf_txt.py, final_crawl.py, data.py를 --retry-recovered로 실행하면 그 URL로 다시 받아 결과 파일에 추가합니다.
+CONCURRENCY = 32  # 동시에 처리할 책 수 (호스트별 요청 수는 retry_policy의 제한기가 따로 조절합니다)
+
+
 def extract_failed_book_ids(log_file):
-    """로그 파일에서 실패한 책 ID를 추출합니다."""
+    """로그 파일에서 실패한 책 ID를 추출합니다. 원장이 생기기 전의 로그를 옮길 때만 씁니다."""
     failed_ids = set()
     with open(log_file, 'r') as file:
         for line in file:
@@ -17,54 +29,97 @@ def extract_failed_book_ids(log_file):
                 failed_ids.add(int(match.group(1)))
     return list(failed_ids)
 
-def find_book_download_url(book_id):
-    """구텐베르크 웹사이트에서 책의 다운로드 링크를 찾습니다. PDF, Plain Text, ePub, HTML을 검색합니다."""
-    base_url = f"https://www.gutenberg.org/ebooks/{book_id}"
-    formats = [
-        ('pdf', f"https://www.gutenberg.org/files/{book_id}/{book_id}-pdf.pdf"),
-        ('txt', f"https://www.gutenberg.org/ebooks/{book_id}.txt.utf-8"),
-        ('epub', f"https://www.gutenberg.org/ebooks/{book_id}.epub.noimages"),
-        ('html', f"https://www.gutenberg.org/ebooks/{book_id}.html.noimages")
+
+def import_log(log_file):
+    """예전 로그의 실패 기록을 원장으로 옮깁니다. 이미 원장에 있는 책은 건드리지 않습니다."""
+    known = {entry['book_id'] for entry in failure_ledger.entries(pending_only=False)}
+    book_ids = [book_id for book_id in extract_failed_book_ids(log_file) if str(book_id) not in known]
+    for book_id in book_ids:
+        failure_ledger.record(book_id, [], f"All URL patterns failed ({log_file})")
+    return len(book_ids)
+
+
+def format_urls(book_id):
+    # Plain Text, HTML 순서로 확인합니다.
+    # 찾은 URL은 url_cache를 거쳐 본문 다운로더가 텍스트로 디코드하므로 PDF/ePub은 후보에 넣지 않습니다.
+    return [
+        f"https://www.gutenberg.org/ebooks/{book_id}.txt.utf-8",
+        f"https://www.gutenberg.org/ebooks/{book_id}.html.noimages"
     ]
-    
-    try:
-        for format_name, format_url in formats:
-            response = requests.head(format_url)  # GET 대신 HEAD 요청으로 빠르게 링크 확인
-            if response.status_code == 200:
-                return format_url  # 성공적으로 파일을 찾으면 URL 반환
-    except Exception as e:
-        logging.error(f"Error retrieving book ID {book_id} for format {format_name}: {e}")
+
+
+def find_html_link(html):
+    """책 페이지에서 HTML 형식 링크를 찾습니다. 프로세스 풀에서 실행됩니다."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for link in soup.find_all('a', href=True):
+        if 'html' in link['href']:
+            return f"https://www.gutenberg.org{link['href']}"
+    return None
+
+
+async def find_book_download_url(session, book_id, attempts):
+    """구텐베르크 웹사이트에서 책의 다운로드 링크를 찾습니다. 시도한 URL은 attempts에 덧붙입니다."""
+    # 모든 형식을 HEAD 요청으로 동시에 확인하고, 성공한 것 중 우선순위가 가장 높은 URL을 반환
+    url = await url_resolver.resolve_first_async(session, book_id, format_urls(book_id), attempts=attempts)
+    if url:
+        return url
 
     # 기타 다운로드 링크 탐색
+    base_url = f"https://www.gutenberg.org/ebooks/{book_id}"
+    status = None
     try:
-        response = requests.get(base_url)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # HTML 페이지에서 특정 파일 형식을 찾습니다.
-            links = soup.find_all('a', href=True)
-            for link in links:
-                if 'html' in link['href']:
-                    return f"https://www.gutenberg.org{link['href']}"
-    except Exception as e:
+        async with session.get(base_url) as response:
+            status = response.status
+            html = await response.text() if status == 200 else None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logging.error(f"Error retrieving book ID {book_id}: {e}")
+        html = None
+    attempts.append(failure_ledger.attempt(base_url, status))
+    if not html:
+        return None
+    url = await parse_pool.run(find_html_link, html)
+    if url:
+        url_cache.set_resolved(book_id, url)
+    return url
 
-    return None  # 링크를 찾지 못하면 None 반환
 
-def check_failed_books(log_file):
-    """실패한 책 ID를 로그 파일에서 추출하고 다운로드 링크를 검색합니다."""
-    failed_book_ids = extract_failed_book_ids(log_file)
+async def recover_book(session, book_id, semaphore):
+    async with semaphore:
+        attempts = []
+        url = await find_book_download_url(session, book_id, attempts)
+    if url:
+        failure_ledger.mark_recovered(book_id, url)
+        logging.info(f"Book ID {book_id}: Available at {url}")
+    else:
+        failure_ledger.record(book_id, attempts, 'No available download URL found')
+        logging.warning(f"Book ID {book_id}: No available download URL found")
+    return book_id, url
+
+
+async def check_failed_books(concurrency=CONCURRENCY):
+    """원장에서 아직 복구하지 못한 책을 동시에 다시 찾고 {책 ID: URL 또는 None}을 반환합니다."""
+    book_ids = failure_ledger.pending_ids()
+    semaphore = asyncio.Semaphore(concurrency)
     results = {}
-    for book_id in tqdm(failed_book_ids, desc="Processing books"):
-        url = find_book_download_url(book_id)
-        if url:
-            results[book_id] = url
-            logging.info(f"Book ID {book_id}: Available at {url}")
-        else:
-            results[book_id] = 'No available download URL found'
-            logging.warning(f"Book ID {book_id}: No available download URL found")
+    try:
+        async with http_client.create_async_session() as session:
+            tasks = [recover_book(session, book_id, semaphore) for book_id in book_ids]
+            for task in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Processing books"):
+                book_id, url = await task
+                results[book_id] = url
+    finally:
+        url_cache.save()
+        parse_pool.shutdown()
     return results
 
-# 로그 파일을 지정하고 스크립트 실행
-log_file = 'download_books.log'
-results = check_failed_books(log_file)
-print(results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--from-log', metavar='LOG_FILE', help="예전 로그(download_books.log)의 실패 기록을 먼저 원장으로 옮깁니다")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help="동시에 처리할 책 수")
+    args = parser.parse_args()
+    if args.from_log:
+        print(f"{import_log(args.from_log)} books imported from {args.from_log}")
+    results = asyncio.run(check_failed_books(args.concurrency))
+    recovered = sum(1 for url in results.values() if url)
+    print(f"{recovered}/{len(results)} books recovered. Run refinal.py, pdf_txt.py, final_crawl.py or data.py with --retry-recovered to download them.")